@@ -28,8 +28,142 @@
  */
 
 
+// std::vector templates used to pass whole arrays of pads or points in a
+// single call
+
+%template(wxPoint_Vector) std::vector<wxPoint>;
+%template(string_Vector)  std::vector<std::string>;
+
+%{
+  #include <stdexcept>
+%}
+
+%newobject D_PAD::ClonePad;
+
+%extend D_PAD
+{
+  /**
+   * Function ClonePad
+   * returns a new pad which is a copy of this one, with all its properties
+   * (size, shape, drill, layers, offset, orientation, clearances...). The
+   * copy is owned by python until it is added to a module.
+   */
+  D_PAD* ClonePad() const
+  {
+    return new D_PAD( *self );
+  }
+}
+
 %extend MODULE
-{ 
+{
+  /**
+   * Function AddPadCopies
+   * adds a copy of aPad to the module for each position of aPositions,
+   * named with the matching entry of aNames, in a single call: the pad
+   * arrays of the footprint wizards are built this way instead of one
+   * pad and a dozen setter calls at a time.
+   * @param aPad is the pad to copy, it is not added itself.
+   * @param aPositions are the positions of the copies, relative to the
+   *                   module anchor.
+   * @param aNames are the pad names (UTF8), one per position.
+   */
+  void AddPadCopies( const D_PAD* aPad, const std::vector<wxPoint>& aPositions,
+                     const std::vector<std::string>& aNames )
+  {
+    if( aPositions.size() != aNames.size() )
+      throw std::invalid_argument( "AddPadCopies: aPositions and aNames differ in length" );
+
+    for( unsigned ii = 0; ii < aPositions.size(); ii++ )
+    {
+      D_PAD* pad = new D_PAD( *aPad );
+
+      pad->SetPos0( aPositions[ii] );
+      pad->SetPosition( aPositions[ii] );
+      pad->SetPadName( FROM_UTF8( aNames[ii].c_str() ) );
+
+      self->AddPad( pad );
+    }
+  }
+
+  /**
+   * Function AddPolyline
+   * adds a segment to the module between each pair of successive points of
+   * aPoints, in a single call.
+   * @param aPoints are the points, relative to the module anchor.
+   * @param aLayer is the layer of the segments.
+   * @param aWidth is the line width of the segments.
+   * @param aClosed also joins the last point to the first one when true.
+   */
+  void AddPolyline( const std::vector<wxPoint>& aPoints, LAYER_NUM aLayer, int aWidth,
+                    bool aClosed = false )
+  {
+    unsigned count = aPoints.size();
+
+    if( count < 2 )
+      return;
+
+    unsigned segments = ( aClosed && count > 2 ) ? count : count - 1;
+
+    for( unsigned ii = 0; ii < segments; ii++ )
+    {
+      EDGE_MODULE* edge = new EDGE_MODULE( self, S_SEGMENT );
+
+      edge->SetLayer( aLayer );
+      edge->SetWidth( aWidth );
+      edge->SetStart0( aPoints[ii] );
+      edge->SetEnd0( aPoints[(ii + 1) % count] );
+      edge->SetDrawCoord();
+
+      self->GraphicalItems().PushBack( edge );
+    }
+  }
+
+  /**
+   * Function AddArc
+   * adds an arc to the module.
+   * @param aCenter is the centre of the arc, relative to the module anchor.
+   * @param aStart is the start point of the arc, relative to the module anchor.
+   * @param aAngle is the angle of the arc, in tenths of degrees, clockwise
+   *               from aStart.
+   * @param aLayer is the layer of the arc.
+   * @param aWidth is the line width of the arc.
+   */
+  void AddArc( const wxPoint& aCenter, const wxPoint& aStart, double aAngle,
+               LAYER_NUM aLayer, int aWidth )
+  {
+    EDGE_MODULE* edge = new EDGE_MODULE( self, S_ARC );
+
+    edge->SetLayer( aLayer );
+    edge->SetWidth( aWidth );
+    edge->SetStart0( aCenter );
+    edge->SetEnd0( aStart );
+    edge->SetAngle( aAngle );
+    edge->SetDrawCoord();
+
+    self->GraphicalItems().PushBack( edge );
+  }
+
+  /**
+   * Function AddCircle
+   * adds a circle to the module.
+   * @param aCenter is the centre of the circle, relative to the module anchor.
+   * @param aRadius is the radius of the circle.
+   * @param aLayer is the layer of the circle.
+   * @param aWidth is the line width of the circle.
+   */
+  void AddCircle( const wxPoint& aCenter, int aRadius, LAYER_NUM aLayer, int aWidth )
+  {
+    EDGE_MODULE* edge = new EDGE_MODULE( self, S_CIRCLE );
+
+    edge->SetLayer( aLayer );
+    edge->SetWidth( aWidth );
+    edge->SetStart0( aCenter );
+    edge->SetEnd0( aCenter + wxPoint( aRadius, 0 ) );
+    edge->SetDrawCoord();
+
+    self->GraphicalItems().PushBack( edge );
+  }
+
   %pythoncode
   {
      
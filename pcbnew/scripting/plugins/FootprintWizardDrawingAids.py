@@ -39,15 +39,7 @@ class FootprintWizardDrawingAids:
         self.dc['layer'] = layer
 
     def Line(self, x1, y1, x2, y2):
-
-        outline = pcbnew.EDGE_MODULE(self.module)
-        outline.SetWidth(self.dc['width'])
-        outline.SetLayer(self.dc['layer'])
-        outline.SetShape(pcbnew.S_SEGMENT)
-        start = pcbnew.wxPoint(x1, y1)
-        end = pcbnew.wxPoint(x2, y2)
-        outline.SetStartEnd(start, end)
-        self.module.Add(outline)
+        self.Polyline([(x1, y1), (x2, y2)])
 
     # extends from (x1,y1) right
     def HLine(self, x, y, l):
@@ -62,13 +54,32 @@ class FootprintWizardDrawingAids:
         """
         self.Line(x, y, x, y + l)
 
-    def Polyline(self, pts):
+    def Polyline(self, pts, closed = False):
+        """
+        Draw a line through the list of (x, y) points, back to the first
+        one if closed, with all its segments built in a single call
+        """
 
         if len(pts) < 2:
             return
 
-        for i in range(0, len(pts) - 1):
-            self.Line(pts[i][0], pts[i][1], pts[i+1][0], pts[i+1][1])
+        points = [pcbnew.wxPoint(x, y) for x, y in pts]
+        self.module.AddPolyline(points, self.dc['layer'], self.dc['width'], closed)
+
+    def Arc(self, cx, cy, sx, sy, angle):
+        """
+        Draw an arc centred at (cx, cy), starting from (sx, sy), of angle
+        degrees clockwise
+        """
+        self.module.AddArc(pcbnew.wxPoint(cx, cy), pcbnew.wxPoint(sx, sy),
+                           angle * 10, self.dc['layer'], self.dc['width'])
+
+    def Circle(self, x, y, r):
+        """
+        Draw a circle centred at (x, y), of radius r
+        """
+        self.module.AddCircle(pcbnew.wxPoint(x, y), int(r),
+                              self.dc['layer'], self.dc['width'])
 
     def Reference(self, x, y, size):
         """
@@ -99,10 +110,11 @@ class FootprintWizardDrawingAids:
         Draw a rectangular box, centred at (x,y), with given width and
         height
         """
-        self.VLine(x - w/2, y - h/2, h) # left
-        self.VLine(x + w/2, y - h/2, h) # right
-        self.HLine(x - w/2, y + h/2, w) # bottom
-        self.HLine(x - w/2, y - h/2, w) # top
+        self.Polyline([(x - w/2, y - h/2), # top left
+                       (x + w/2, y - h/2), # top right
+                       (x + w/2, y + h/2), # bottom right
+                       (x - w/2, y + h/2)], # bottom left
+                      closed = True)
 
     def NotchedBox(self, x, y, w, h, notchW, notchH):
         """
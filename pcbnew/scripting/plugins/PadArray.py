@@ -1,4 +1,6 @@
 
+from __future__ import division
+import math
 import pcbnew
 
 class PadMaker:
@@ -37,6 +39,120 @@ class PadMaker:
         pad = self.SMDPad(size, size, shape = pcbnew.PAD_CIRCLE)
         return pad
 
+#-----<Layouts>-------------------------------------------------------------------
+#
+# The layout functions below compute the positions, or names, of a whole array
+# of pads at once, as lists of (x, y) tuples or of strings, in the order the
+# pads are numbered.  They make no call to pcbnew: the pads are then all placed
+# with a single MODULE.AddPadCopies() call, see PadArray.AddPadCopies()
+
+def GridPositions(nx, ny, px, py, pin1Pos):
+    """
+    Positions of a grid of nx columns of ny pads, column by column, starting
+    from pin1Pos
+    """
+    x0 = pin1Pos.x
+    y0 = pin1Pos.y
+    ys = [y0 + py * y for y in range(ny)]
+    return [(x0 + px * x, posY) for x in range(nx) for posY in ys]
+
+def LinePositions(n, pitch, isVertical, pin1Pos):
+    """
+    Positions of a line of n pads, starting from pin1Pos
+    """
+    if isVertical:
+        return GridPositions(1, n, 0, pitch, pin1Pos)
+    return GridPositions(n, 1, pitch, 0, pin1Pos)
+
+def StaggeredPositions(nx, ny, px, py, pin1Pos, offset = None):
+    """
+    Positions of a grid of nx columns of ny pads, like GridPositions(), where
+    every other column is shifted along the column by offset (half the pitch
+    py by default)
+    """
+    if offset is None:
+        offset = py / 2
+
+    x0 = pin1Pos.x
+    ys = [pin1Pos.y + py * y for y in range(ny)]
+    shifted = [posY + offset for posY in ys]
+
+    positions = []
+    for x in range(nx):
+        posX = x0 + px * x
+        if x % 2:
+            positions.extend([(posX, posY) for posY in shifted])
+        else:
+            positions.extend([(posX, posY) for posY in ys])
+    return positions
+
+def CircularPositions(n, radius, center, startAngle = 0, angleStep = None):
+    """
+    Positions of n pads on a circle, counterclockwise from startAngle, in
+    degrees, 0 being to the right of center.  The pads are spread all around
+    the circle unless angleStep, in degrees, is given
+    """
+    if angleStep is None:
+        angleStep = 360 / n
+
+    positions = []
+    for i in range(n):
+        angle = math.radians(startAngle + angleStep * i)
+        # y goes down in pcbnew
+        positions.append((int(round(center.x + radius * math.cos(angle))),
+                          int(round(center.y - radius * math.sin(angle)))))
+    return positions
+
+def NumberNames(n, firstPad = 1):
+    """
+    Names of n pads numbered from firstPad
+    """
+    return [str(i) for i in range(firstPad, firstPad + n)]
+
+# AlphaNameFromNumber() results, by (n, aIndex, alphabet)
+_alpha_names = {}
+
+def AlphaNameFromNumber(n, aIndex = 1, alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"):
+    """
+    Alphabetic name of the number n, 1 - A, 2 - B, 26 - Z, 27 - AA, etc.
+    Results are memoized.
+
+    aIndex -- 0 for 0 - A
+    alphabet -- set of allowable chars if not A-Z, eg ABCDEFGHJKLMNPRTUVWY
+                for BGA
+    """
+    key = (n, aIndex, alphabet)
+    try:
+        return _alpha_names[key]
+    except KeyError:
+        pass
+
+    alpha = ""
+    div = n
+    while True:
+        div, mod = divmod(div - aIndex, len(alphabet))
+        alpha = alphabet[mod] + alpha
+        if div <= 0:
+            break
+
+    _alpha_names[key] = alpha
+    return alpha
+
+def AlphaGridNames(nx, ny, aIndex = 1, alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"):
+    """
+    Names of a grid of nx columns of ny pads, in the order of GridPositions(),
+    made of a letter for the row and a number for the column, e.g. A1, B1...
+    as for BGAs
+    """
+    rows = [AlphaNameFromNumber(y + aIndex, aIndex, alphabet) for y in range(ny)]
+    names = []
+    for x in range(nx):
+        column = str(x + 1)
+        names.extend([row + column for row in rows])
+    return names
+
+#-----</Layouts>------------------------------------------------------------------
+
 class PadArray:
 
     def __init__(self):
@@ -45,25 +161,44 @@ class PadArray:
     def SetFirstPadInArray(self, fpNum):
         self.firstPad = fpNum
 
-    # HACK! pad should one day have its own clone method
     def ClonePad(self):
-
-        pad = pcbnew.D_PAD(self.pad.GetParent())
-
-        pad.SetSize(self.pad.GetSize())
-        pad.SetShape(self.pad.GetShape())
-        pad.SetAttribute(self.pad.GetAttribute())
-        pad.SetLayerMask(self.pad.GetLayerMask())
-        pad.SetDrillSize(self.pad.GetDrillSize())
-
-        return pad
+        # a native copy, which keeps every property of the pad
+        return self.pad.ClonePad()
 
     def AddPad(self, pad):
         self.pad.GetParent().Add(pad)
 
+    def AddPadCopies(self, positions, names, pad = None):
+        """
+        Add a copy of pad (self.pad by default) at each of the positions, a
+        list of (x, y), with the matching name, in a single call to the module
+        """
+        if pad is None:
+            pad = self.pad
+
+        points = [pcbnew.wxPoint(x, y) for x, y in positions]
+        pad.GetParent().AddPadCopies(pad, points, names)
+
+    def GetPositions(self):
+        """
+        The list of the (x, y) positions of the pads of the array
+        """
+        return []
+
+    def GetNames(self):
+        """
+        The list of the names of the pads, in the order of GetPositions()
+        """
+        return NumberNames(len(self.GetPositions()), self.firstPad)
+
+    def AddPadsToModule(self):
+        self.AddPadCopies(self.GetPositions(), self.GetNames())
+
 class PadGridArray(PadArray):
 
     def __init__(self, pad, nx, ny, px, py, pin1Pos):
+        PadArray.__init__(self)
+
         # this pad is more of a "context", we will use it as a source of
         # pad data, but not actually add it
         self.pad = pad
@@ -73,43 +208,21 @@ class PadGridArray(PadArray):
         self.py = py
         self.pin1Pos = pin1Pos
 
-    # handy utility function 1 - A, 2 - B, 26 - AA, etc
-    # aIndex = 0 for 0 - A
-    # alphabet = set of allowable chars if not A-Z, eg ABCDEFGHJKLMNPRTUVWY for BGA
+    # handy utility function 1 - A, 2 - B, 26 - AA, etc, see AlphaNameFromNumber()
     def AlphaNameFromNumber(self, n, aIndex = 1, alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"):
-
-        div, mod = divmod(n - aIndex, len(alphabet))
-        alpha = alphabet[mod]
-
-        if div > 0:
-            return self.AlphaNameFromNumber(div, aIndex, alphabet) + alpha;
-
-        return alpha;
+        return AlphaNameFromNumber(n, aIndex, alphabet)
 
     # right to left, top to bottom
     def NamingFunction(self, x, y):
         return self.firstPad + (self.nx * y + x)
 
-    #relocate the pad and add it as many times as we need
-    def AddPadsToModule(self):
-
-        for x in range(0, self.nx):
-            for y in range(self.ny):
-                posX = self.pin1Pos.x + (self.px * x)
-                posY = self.pin1Pos.y + (self.py * y)
-
-                pos = pcbnew.wxPoint(posX, posY)
-
-                # THIS DOESN'T WORK yet!
-                #pad = self.pad.Clone()
-                pad = self.ClonePad()
-
-                pad.SetPos0(pos)
-                pad.SetPosition(pos)
+    def GetPositions(self):
+        return GridPositions(self.nx, self.ny, self.px, self.py, self.pin1Pos)
 
-                pad.SetPadName(str(self.NamingFunction(x,y)))
-
-                self.AddPad(pad)
+    def GetNames(self):
+        # in the order of GridPositions(), column by column
+        naming = self.NamingFunction
+        return [str(naming(x, y)) for x in range(self.nx) for y in range(self.ny)]
 
 class PadLineArray(PadGridArray):
 
@@ -120,30 +233,86 @@ class PadLineArray(PadGridArray):
         else:
             PadGridArray.__init__(self, pad, n, 1, pitch, 0, pin1Pos)
 
+    def GetNames(self):
+        # pads of a line are numbered in order, whatever its direction
+        return NumberNames(self.nx * self.ny, self.firstPad)
+
+class PadStaggeredGridArray(PadGridArray):
+
+    def __init__(self, pad, nx, ny, px, py, pin1Pos, offset = None):
+        PadGridArray.__init__(self, pad, nx, ny, px, py, pin1Pos)
+        self.offset = offset
+
+    def GetPositions(self):
+        return StaggeredPositions(self.nx, self.ny, self.px, self.py,
+                                  self.pin1Pos, self.offset)
+
+class PadCircularArray(PadArray):
+
+    def __init__(self, pad, n, radius, center, startAngle = 0, angleStep = None):
+        PadArray.__init__(self)
+
+        self.pad = pad
+        self.n = int(n)
+        self.radius = radius
+        self.center = center
+        self.startAngle = startAngle
+        self.angleStep = angleStep
+
+    def GetPositions(self):
+        return CircularPositions(self.n, self.radius, self.center,
+                                 self.startAngle, self.angleStep)
+
 class RectPadArray(PadArray):
+    """
+    Four rows of pads around a rectangle, as for QFPs: ny pads of h_pad on
+    the left and right sides, h_pitch apart, and nx pads of v_pad on the
+    bottom and top sides, v_pitch apart, numbered counterclockwise from the
+    top of the left row
+    """
 
-    def __init__(self, nx, ny, pitch, xpitch, ypitch, pin1Pos):
-
-        #left row
-        pin1Pos = pcbnew.wxPoint(-h_pitch / 2, -row_len / 2)
-        array = PadLineArray(h_pad, pads_per_row, pad_pitch, True, pin1Pos)
-        array.SetFirstPadInArray(1)
-        array.AddPadsToModule()
-
-        #bottom row
-        pin1Pos = pcbnew.wxPoint(-row_len / 2, v_pitch / 2)
-        array = PA.PadLineArray(v_pad, pads_per_row, pad_pitch, False, pin1Pos)
-        array.SetFirstPadInArray(pads_per_row + 1)
-        array.AddPadsToModule()
-
-        #right row
-        pin1Pos = pcbnew.wxPoint(h_pitch / 2, row_len / 2)
-        array = PadLineArray(h_pad, pads_per_row, -pad_pitch, True, pin1Pos)
-        array.SetFirstPadInArray(2*pads_per_row + 1)
-        array.AddPadsToModule()
-
-        #top row
-        pin1Pos = pcbnew.wxPoint(row_len / 2, -v_pitch / 2)
-        array = PadLineArray(v_pad, pads_per_row, -pad_pitch, False, pin1Pos)
-        array.SetFirstPadInArray(3*pads_per_row + 1)
-        array.AddPadsToModule()
+    def __init__(self, h_pad, v_pad, nx, ny, pitch, h_pitch, v_pitch):
+        PadArray.__init__(self)
+
+        self.pad = h_pad
+        self.h_pad = h_pad
+        self.v_pad = v_pad
+        self.nx = int(nx)
+        self.ny = int(ny)
+        self.pitch = pitch
+        self.h_pitch = h_pitch
+        self.v_pitch = v_pitch
+
+    def GetRows(self):
+        """
+        The (pad, positions) of the left, bottom, right and top rows
+        """
+        x_len = (self.nx - 1) * self.pitch
+        y_len = (self.ny - 1) * self.pitch
+        h = self.h_pitch / 2
+        v = self.v_pitch / 2
+
+        return [
+            (self.h_pad, LinePositions(self.ny, self.pitch, True,
+                                       pcbnew.wxPoint(-h, -y_len / 2))),
+            (self.v_pad, LinePositions(self.nx, self.pitch, False,
+                                       pcbnew.wxPoint(-x_len / 2, v))),
+            (self.h_pad, LinePositions(self.ny, -self.pitch, True,
+                                       pcbnew.wxPoint(h, y_len / 2))),
+            (self.v_pad, LinePositions(self.nx, -self.pitch, False,
+                                       pcbnew.wxPoint(x_len / 2, -v))),
+            ]
+
+    def GetPositions(self):
+        positions = []
+        for pad, rowPositions in self.GetRows():
+            positions.extend(rowPositions)
+        return positions
+
+    def AddPadsToModule(self):
+        names = self.GetNames()
+        first = 0
+        for pad, positions in self.GetRows():
+            last = first + len(positions)
+            self.AddPadCopies(positions, names[first:last], pad)
+            first = last
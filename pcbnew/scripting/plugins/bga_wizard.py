@@ -26,6 +26,10 @@ class BGAPadGridArray(PA.PadGridArray):
     def NamingFunction(self, x, y):
         return "%s%d" % (self.AlphaNameFromNumber(y + 1, alphabet="ABCDEFGHJKLMNPRTUVWY"), x + 1)
 
+    def GetNames(self):
+        # the row labels are only worked out once per row
+        return PA.AlphaGridNames(self.nx, self.ny, alphabet="ABCDEFGHJKLMNPRTUVWY")
+
 
 class BGAWizard(HFPW.HelpfulFootprintWizardPlugin):
 
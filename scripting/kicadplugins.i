@@ -41,8 +41,15 @@
 %pythoncode
 {
 
+import hashlib as _hashlib
+from collections import OrderedDict as _OrderedDict
+
 KICAD_PLUGINS={}
 
+# the registered footprint wizards, by name, for scripts driving them
+# without the footprint wizard frame
+KICAD_FOOTPRINT_WIZARDS={}
+
 def ReloadPlugin(name):
     if not KICAD_PLUGINS.has_key(name):
         return False
@@ -123,6 +130,7 @@ class KiCadPlugin:
             pass # register to file plugins in C++
         if isinstance(self,FootprintWizardPlugin):
             PYTHON_FOOTPRINT_WIZARDS.register_wizard(self)
+            KICAD_FOOTPRINT_WIZARDS[self.GetName()]=self
             return
 
         if isinstance(self,ActionPlugin):
@@ -135,6 +143,10 @@ class KiCadPlugin:
             pass # register to file plugins in C++
         if isinstance(self,FootprintWizardPlugin):
             PYTHON_FOOTPRINT_WIZARDS.deregister_wizard(self)
+            if KICAD_FOOTPRINT_WIZARDS.get(self.GetName()) is self:
+                del KICAD_FOOTPRINT_WIZARDS[self.GetName()]
+            # a reloaded wizard of the same name may build other footprints
+            self.ClearModuleCache()
             return
 
         if isinstance(self,ActionPlugin):
@@ -152,6 +164,12 @@ class FilePlugin(KiCadPlugin):
 
 
 class FootprintWizardPlugin(KiCadPlugin):
+
+    # the footprints built by the wizards, kept by GetModule() as
+    # {(wizard name, parameters key): MODULE}, least recently used first
+    module_cache = _OrderedDict()
+    module_cache_size = 16
+
     def __init__(self):
         KiCadPlugin.__init__(self)
         self.defaults()
@@ -163,6 +181,7 @@ class FootprintWizardPlugin(KiCadPlugin):
         self.name = "Undefined Footprint Wizard plugin"
         self.description = ""
         self.image = ""
+        self.checked_parameters = None
 
     def GetName(self):
         return self.name
@@ -190,7 +209,13 @@ class FootprintWizardPlugin(KiCadPlugin):
         return map( lambda x: str(x) , values) # list elements as strings
 
     def GetParameterErrors(self,page_n):
-        self.CheckParameters()
+        # the errors are asked for page by page, only check the parameters
+        # again if they changed
+        key = self.GetParametersKey()
+        if key != self.checked_parameters:
+            self.ClearErrors()
+            self.CheckParameters()
+            self.checked_parameters = self.GetParametersKey()
         name = self.GetParameterPageName(page_n)
         values = self.parameter_errors[name].values()
         return map( lambda x: str(x) , values) # list elements as strings
@@ -232,8 +257,67 @@ class FootprintWizardPlugin(KiCadPlugin):
         self.parameter_errors = errs
 
 
+    def GetParametersKey(self):
+        """
+        A digest of the parameters, the same for equal values however they
+        are written, e.g. 5, 5.0 and "5"
+        """
+        def canonical(value):
+            if isinstance(value, bool):
+                return str(value)
+            try:
+                return repr(float(value))
+            except (TypeError, ValueError):
+                return str(value)
+
+        pages = []
+        for page in sorted(self.parameters.keys()):
+            params = self.parameters[page]
+            pages.append((page, [(name, canonical(params[name]))
+                                 for name in sorted(params.keys())]))
+
+        return _hashlib.sha1(repr(pages).encode("utf8")).hexdigest()
+
+    def HasParameterErrors(self):
+        for page in self.parameter_errors.values():
+            for error in page.values():
+                if error:
+                    return True
+        return False
+
+    def ClearModuleCache(self):
+        """
+        Forget the footprints built by this wizard
+        """
+        cache = FootprintWizardPlugin.module_cache
+        for key in list(cache.keys()):
+            if key[0] == self.GetName():
+                del cache[key]
+
     def GetModule(self):
+        # the footprint is only built the first time a set of parameters is
+        # seen, a copy of it is returned when they come back
+        cache = FootprintWizardPlugin.module_cache
+        key = (self.GetName(), self.GetParametersKey())
+
+        cached = cache.pop(key, None)
+        if cached is not None:
+            cache[key] = cached     # most recently used
+            # BuildFootprint() is skipped, the errors it would have checked
+            # must still be those of these parameters
+            self.ClearErrors()
+            self.CheckParameters()
+            self.checked_parameters = self.GetParametersKey()
+            self.module = MODULE(cached)
+            return self.module
+
         self.BuildFootprint()
+
+        if self.module is not None and not self.HasParameterErrors():
+            cache[key] = MODULE(self.module)
+            while len(cache) > self.module_cache_size:
+                cache.popitem(last=False)
+
         return self.module
 
     def BuildFootprint(self):
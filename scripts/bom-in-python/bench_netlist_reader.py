@@ -0,0 +1,384 @@
+#
+# Benchmark for kicad_netlist_reader.py and the BOM scripts
+#
+# Synthesizes generic netlists of increasing size and times, separately for
+# each size, loading the netlist, netlist.getInterestingComponents(),
+# netlist.groupComponents() and each output formatter: the writers of
+# kicad_bom_writer.py, the bom_*.py scripts and netlist.writeXML().  Any non
+# linear behaviour shows up as a growing time per component.
+#
+# The peak memory allocated by each stage is recorded too, with tracemalloc
+# (python 3.4+), in a second run of the stage so that tracing does not slow
+# down the timed one.  With --json, the results are written to a file, along
+# with the python version and platform, so that runs can be compared.
+#
+# With --memory, the memory held by the loaded tree is also compared against
+# that of the plain (pre __slots__) element class.
+#
+# Only the standard library is used.
+#
+# Usage: python bench_netlist_reader.py [--json <results.json>] [--repeat <n>]
+#                                       [--memory] [component_count ...]
+#
+
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import kicad_netlist_reader
+import bom_batch
+
+try:
+    import tracemalloc
+except ImportError:
+    # python 2, peak memory is not recorded
+    tracemalloc = None
+
+
+# (prefix, lib, part, values, footprint, pin count) of the parts used to
+# build the design
+part_kinds = [
+    ('R', 'device', 'R', ['10K', '4K7', '100R', '1M'], 'SM0603', 2),
+    ('C', 'device', 'C', ['100nF', '10uF', '22pF'], 'SM0603', 2),
+    ('L', 'device', 'INDUCTOR', ['10uH'], 'SM1206', 2),
+    ('D', 'device', 'LED', ['RED', 'GREEN'], 'LED-0805', 2),
+    ('U', 'linear', 'LM358', ['LM358'], 'SO8', 8),
+    ('TP', 'conn', 'TEST_POINT', ['TP'], 'TP', 1),
+    ]
+
+# The formatters timed, by name, see bom_batch.getFormatter()
+formatters = [
+    'csv', 'tsv', 'html', 'json',
+    'bom_csv_by_ref', 'bom_csv_by_ref_v2', 'bom_csv_grouped_by_value',
+    'bom_html_by_value', 'bom_html_grouped_by_value', 'bom-generation',
+    ]
+
+
+def writeNetlist(f, count, libparts_per_kind=20):
+    """Write a synthetic generic netlist with 'count' components to the open
+    file f.  Each kind of part is given a number of libparts (only one of
+    which is used) so that libpart linking has some work to do.  Pins 1 and 2
+    of the components are chained by two node nets, and the power pins of the
+    integrated circuits share two large nets.
+    """
+    f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    f.write('<export version="D">\n')
+    f.write('  <design>\n')
+    f.write('    <source>/tmp/synthetic.sch</source>\n')
+    f.write('    <date>Sat 18 Oct 2026 12:00:00 UTC</date>\n')
+    f.write('    <tool>bench_netlist_reader.py</tool>\n')
+    f.write('  </design>\n')
+
+    f.write('  <components>\n')
+    for i in range(count):
+        prefix, lib, part, values, footprint, pins = part_kinds[i % len(part_kinds)]
+        value = values[(i // len(part_kinds)) % len(values)]
+        f.write('    <comp ref="' + prefix + str(i + 1) + '">\n')
+        f.write('      <value>' + value + '</value>\n')
+        f.write('      <footprint>' + footprint + '</footprint>\n')
+        f.write('      <fields>\n')
+        f.write('        <field name="Vendor">Digikey</field>\n')
+        f.write('        <field name="Tolerance">5%</field>\n')
+        f.write('      </fields>\n')
+        f.write('      <libsource lib="' + lib + '" part="' + part + '"/>\n')
+        f.write('      <sheetpath names="/" tstamps="/"/>\n')
+        f.write('      <tstamp>' + ('%08X' % (i + 1)) + '</tstamp>\n')
+        f.write('    </comp>\n')
+    f.write('  </components>\n')
+
+    f.write('  <libparts>\n')
+    for prefix, lib, part, values, footprint, pins in part_kinds:
+        for n in range(libparts_per_kind):
+            name = part
+            if n:
+                name = part + '_' + str(n)
+            f.write('    <libpart lib="' + lib + '" part="' + name + '">\n')
+            f.write('      <aliases>\n')
+            f.write('        <alias>' + name + '_ALT</alias>\n')
+            f.write('      </aliases>\n')
+            f.write('      <description>' + name + ' description</description>\n')
+            f.write('      <fields>\n')
+            f.write('        <field name="Reference">' + prefix + '</field>\n')
+            f.write('        <field name="Value">' + name + '</field>\n')
+            f.write('        <field name="Footprint">' + footprint + '</field>\n')
+            f.write('        <field name="Datasheet">http://example.com/' + name + '.pdf</field>\n')
+            f.write('      </fields>\n')
+            f.write('      <pins>\n')
+            for pin in range(1, pins + 1):
+                f.write('        <pin num="' + str(pin) + '" name="~" type="passive"/>\n')
+            f.write('      </pins>\n')
+            f.write('    </libpart>\n')
+    f.write('  </libparts>\n')
+
+    f.write('  <libraries>\n')
+    for lib in sorted(set([k[1] for k in part_kinds])):
+        f.write('    <library logical="' + lib + '">\n')
+        f.write('      <uri>/usr/share/kicad/library/' + lib + '.lib</uri>\n')
+        f.write('    </library>\n')
+    f.write('  </libraries>\n')
+
+    # chain pin 2 of each component to pin 1 of the next
+    f.write('  <nets>\n')
+    for i in range(count):
+        ref_a = part_kinds[i % len(part_kinds)][0] + str(i + 1)
+        j = (i + 1) % count
+        ref_b = part_kinds[j % len(part_kinds)][0] + str(j + 1)
+        f.write('    <net code="' + str(i + 1) + '" name="N-' + str(i + 1) + '">\n')
+        f.write('      <node ref="' + ref_a + '" pin="2"/>\n')
+        f.write('      <node ref="' + ref_b + '" pin="1"/>\n')
+        f.write('    </net>\n')
+
+    # and the power pins of the integrated circuits
+    for code, name, pin in ((count + 1, 'GND', '4'), (count + 2, '+3V3', '8')):
+        f.write('    <net code="' + str(code) + '" name="' + name + '">\n')
+        for i in range(count):
+            if part_kinds[i % len(part_kinds)][0] == 'U':
+                f.write('      <node ref="U' + str(i + 1) + '" pin="' + pin + '"/>\n')
+        f.write('    </net>\n')
+    f.write('  </nets>\n')
+    f.write('</export>\n')
+
+
+def makeNetlist(count):
+    """Return the name of a temporary file holding a synthetic netlist"""
+    fd, fname = tempfile.mkstemp(suffix='.xml', prefix='bench_netlist_')
+    f = os.fdopen(fd, 'w')
+    try:
+        writeNetlist(f, count)
+    finally:
+        f.close()
+    return fname
+
+
+class legacyElement(object):
+    """The original layout of kicad_netlist_reader.xmlElement: every instance
+    has its own __dict__, attributes dict and children list.  Only what is
+    needed to load a netlist is implemented.
+    """
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.attributes = {}
+        self.parent = parent
+        self.chars = ""
+        self.children = []
+
+    # the reader uses the private names of xmlElement, to read the indexes
+    # and to set the attributes it has built
+    @property
+    def _attributes(self):
+        return self.attributes
+
+    @_attributes.setter
+    def _attributes(self, attributes):
+        self.attributes = attributes if attributes is not None else {}
+
+    @property
+    def _children(self):
+        return self.children
+
+    @_children.setter
+    def _children(self, children):
+        self.children = children if children is not None else []
+
+    def addAttribute(self, attr, value):
+        self.attributes[attr] = value
+
+    def addChars(self, chars):
+        self.chars += chars
+
+    def addChild(self, child):
+        self.children.append(child)
+        return child
+
+    def getParent(self):
+        return self.parent
+
+    def getChild(self, name):
+        for child in self.children:
+            if child.name == name:
+                return child
+        return None
+
+    def getChildren(self, name=None):
+        if name:
+            return [child for child in self.children if child.name == name]
+        return self.children
+
+    def get(self, elemName, attribute="", attrmatch=""):
+        if (self.name == elemName):
+            if attribute != "":
+                if attrmatch != "":
+                    if self.attributes[attribute] == attrmatch:
+                        return self.chars
+                else:
+                    return self.attributes[attribute]
+            else:
+                return self.chars
+
+        for child in self.children:
+            ret = child.get(elemName, attribute, attrmatch)
+            if ret != "":
+                return ret
+
+        return ""
+
+
+def measureMemory(fname, element_class):
+    """Return the number of bytes still allocated once the netlist fname has
+    been loaded using element_class for the nodes of the tree.
+    """
+    saved = kicad_netlist_reader.xmlElement
+    kicad_netlist_reader.xmlElement = element_class
+    gc.collect()
+    tracemalloc.start()
+    try:
+        net = kicad_netlist_reader.netlist(fname)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+        kicad_netlist_reader.xmlElement = saved
+    del net
+    return size
+
+
+def runStage(stage, repeat):
+    """Run the function stage 'repeat' times and return its last result, the
+    shortest time it took in seconds and, if tracemalloc is available, the
+    peak number of bytes allocated by one more, traced, run."""
+    best = None
+    for i in range(repeat):
+        gc.collect()
+        start = time.time()
+        result = stage()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    peak = None
+    if tracemalloc:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            stage()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return result, best, peak
+
+
+def benchNetlist(count, repeat=1):
+    """Return the results of each stage for a synthetic netlist of 'count'
+    components, as a dict holding, for each stage name, a dict of its
+    'seconds' and 'peak_bytes'."""
+    fname = makeNetlist(count)
+    devnull = open(os.devnull, 'w')
+    try:
+        size = os.path.getsize(fname)
+        stages = []
+
+        net, seconds, peak = runStage(
+            lambda: kicad_netlist_reader.netlist(fname), repeat)
+        stages.append(('load', seconds, peak))
+
+        components, seconds, peak = runStage(
+            lambda: net.getInterestingComponents(), repeat)
+        stages.append(('getInterestingComponents', seconds, peak))
+
+        groups, seconds, peak = runStage(
+            lambda: net.groupComponents(components), repeat)
+        stages.append(('groupComponents', seconds, peak))
+
+        for name in formatters:
+            writeBOM = bom_batch.getFormatter(name)[0]
+            seconds, peak = runStage(lambda: writeBOM(net, devnull), repeat)[1:]
+            stages.append(('format:' + name, seconds, peak))
+
+        seconds, peak = runStage(lambda: net.writeXML(devnull), repeat)[1:]
+        stages.append(('format:xml', seconds, peak))
+    finally:
+        devnull.close()
+        os.remove(fname)
+
+    results = []
+    for name, seconds, peak in stages:
+        results.append({'stage': name, 'seconds': seconds, 'peak_bytes': peak})
+    return {'components': count, 'netlist_bytes': size, 'stages': results}
+
+
+def printResults(result):
+    count = result['components']
+    print()
+    print(count, 'components,', result['netlist_bytes'], 'bytes of netlist')
+    print('  stage                               time (s)  per component (us)  peak (MB)')
+    for stage in result['stages']:
+        peak = '         -'
+        if stage['peak_bytes'] is not None:
+            peak = '%10.1f' % (stage['peak_bytes'] / 1e6)
+        print('  %-33s %10.3f  %18.1f %s' % (stage['stage'], stage['seconds'],
+              1e6 * stage['seconds'] / count, peak))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the netlist reader and the BOM formatters')
+    parser.add_argument('counts', nargs='*', type=int,
+        default=[1000, 10000, 100000],
+        help='numbers of components of the netlists (default: 1000 10000 100000)')
+    parser.add_argument('--json', metavar='FILE',
+        help='write the results to FILE as JSON')
+    parser.add_argument('--repeat', type=int, default=1,
+        help='run each stage this many times and keep the shortest time')
+    parser.add_argument('--memory', action='store_true',
+        help='also compare the memory held by the tree against the legacy '
+             'element class')
+    args = parser.parse_args(argv[1:])
+
+    run = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': args.repeat,
+        'results': [],
+        }
+
+    for count in args.counts:
+        result = benchNetlist(count, args.repeat)
+        printResults(result)
+        run['results'].append(result)
+
+    if args.json:
+        f = open(args.json, 'w')
+        try:
+            json.dump(run, f, indent=2, sort_keys=True)
+            f.write('\n')
+        finally:
+            f.close()
+
+    if args.memory and not tracemalloc:
+        print('--memory needs tracemalloc, python 3.4+', file=sys.stderr)
+    elif args.memory:
+        count = max(args.counts)
+        print()
+        print('tree memory for', count, 'components')
+        fname = makeNetlist(count)
+        try:
+            legacy = measureMemory(fname, legacyElement)
+            compact = measureMemory(fname, kicad_netlist_reader.xmlElement)
+        finally:
+            os.remove(fname)
+        print('  legacy element:  %8.1f MB' % (legacy / 1e6))
+        print('  xmlElement:      %8.1f MB  (%.0f%% of legacy)' %
+            (compact / 1e6, 100.0 * compact / legacy))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
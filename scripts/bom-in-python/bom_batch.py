@@ -0,0 +1,196 @@
+#
+# Python script to generate the BOMs of many KiCad generic netlists at once
+#
+# The netlists are shared out between a pool of worker processes, each of
+# which loads the netlist and writes its BOM with a "formatter": either one
+# of the bom_*.py scripts of this directory (any script defining
+# writeBOM(net, f) can be used), or the name of one of the writers of
+# kicad_bom_writer.py (csv, tsv, html or json) for the common grouped BOM.
+#
+# Example:
+#   python bom_batch.py -o boms bom_csv_grouped_by_value 'boards/*.xml'
+#
+# writes boms/<netlist name>.csv for every netlist of boards/.  Without -o, each
+# BOM is written next to its netlist.  When a netlist fails, its error is
+# written to <BOM file name>.err instead.  A summary of the time taken to load
+# each netlist and write its BOM is printed at the end, along with the problems
+# found in the netlists, such as missing libparts or duplicate references.
+#
+
+from __future__ import print_function
+
+import argparse
+import glob
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+import kicad_netlist_reader
+import kicad_bom_writer
+
+
+def getFormatter(name):
+    """Return the (writeBOM, extension) pair of the formatter called name"""
+    if name in kicad_bom_writer.writers:
+        def writeBOM(net, f):
+            kicad_bom_writer.writeBOM(net, f, name)
+        return writeBOM, kicad_bom_writer.writers[name].extension
+
+    module = importlib.import_module(name)
+    return module.writeBOM, getattr(module, 'extension', '.txt')
+
+
+def expandNetlists(patterns):
+    """Return the sorted list of netlist files named or matched by the
+    filenames and glob patterns in 'patterns', without duplicates.
+    """
+    names = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern)
+        if matches:
+            names.update(matches)
+        else:
+            # not a pattern, let the worker report the missing file
+            names.add(pattern)
+    return sorted(names)
+
+
+def outputName(netlist, outdir, extension):
+    """Return the name of the BOM file of the netlist file 'netlist'"""
+    base = os.path.splitext(os.path.basename(netlist))[0] + extension
+    if outdir:
+        return os.path.join(outdir, base)
+    return os.path.join(os.path.dirname(netlist), base)
+
+
+def runJob(job):
+    """Load one netlist and write its BOM.  Runs in a worker process.
+
+    Keywords:
+    job -- a (formatter, netlist, output) tuple
+
+    Returns a dict with the netlist and output names, the load and render
+    times in seconds, the problems found in the netlist and, if something
+    went wrong, the error.
+    """
+    formatter, netlist, output = job
+    result = {'netlist': netlist, 'output': output,
+              'parse': 0.0, 'render': 0.0, 'error': None, 'diagnostics': []}
+    errname = output + '.err'
+
+    try:
+        writeBOM = getFormatter(formatter)[0]
+
+        start = time.time()
+        net = kicad_netlist_reader.netlist(netlist, errors='raise')
+        result['parse'] = time.time() - start
+        result['diagnostics'] = [str(d) for d in net.diagnostics]
+
+        start = time.time()
+        f = open(output, 'w')
+        try:
+            writeBOM(net, f)
+        finally:
+            f.close()
+        result['render'] = time.time() - start
+    except kicad_netlist_reader.netlistError as e:
+        result['error'] = '\n'.join([str(d) for d in e.diagnostics]) + '\n'
+    except (Exception, SystemExit):
+        # a BOM script may exit, catch that too
+        result['error'] = traceback.format_exc()
+
+    try:
+        if result['error']:
+            f = open(errname, 'w')
+            try:
+                f.write(netlist + '\n\n' + result['error'])
+            finally:
+                f.close()
+        elif os.path.exists(errname):
+            # an error report from an earlier run no longer applies
+            os.remove(errname)
+    except (IOError, OSError):
+        pass
+
+    return result
+
+
+def printSummary(results, elapsed, out=sys.stdout):
+    """Print the per netlist timings and failures, followed by totals"""
+    failed = 0
+    parse = 0.0
+    render = 0.0
+
+    print('  load (s)  render (s)  netlist', file=out)
+    for r in results:
+        status = ''
+        if r['error']:
+            failed += 1
+            status = '  FAILED, see ' + r['output'] + '.err'
+        print('%10.3f  %10.3f  %s%s' % (r['parse'], r['render'], r['netlist'], status),
+              file=out)
+        for d in r['diagnostics']:
+            print('                        ' + d, file=out)
+        parse += r['parse']
+        render += r['render']
+
+    print('%10.3f  %10.3f  total of %d netlists, %d failed, %.3f s elapsed' %
+          (parse, render, len(results), failed, elapsed), file=out)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description='Generate the BOMs of many KiCad generic netlists')
+    parser.add_argument('formatter',
+        help='name of the BOM script to use, e.g. bom_csv_grouped_by_value, '
+             'or of a writer: ' + ', '.join(sorted(kicad_bom_writer.writers)))
+    parser.add_argument('netlists', nargs='+',
+        help='netlist files, or glob patterns matching them')
+    parser.add_argument('-o', '--outdir',
+        help='directory to write the BOMs to, instead of next to each netlist')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+        help='number of worker processes (default: one per CPU)')
+    args = parser.parse_args(argv[1:])
+
+    formatter = args.formatter
+    if formatter.endswith('.py'):
+        formatter = formatter[:-3]
+    extension = getFormatter(formatter)[1]
+
+    netlists = expandNetlists(args.netlists)
+    if args.outdir and not os.path.isdir(args.outdir):
+        os.makedirs(args.outdir)
+
+    jobs = []
+    outputs = set()
+    for netlist in netlists:
+        output = outputName(netlist, args.outdir, extension)
+        if output in outputs:
+            print(__file__, ':', netlist, 'skipped, its BOM would overwrite',
+                  output, file=sys.stderr)
+            continue
+        outputs.add(output)
+        jobs.append((formatter, netlist, output))
+
+    start = time.time()
+    pool = multiprocessing.Pool(args.jobs)
+    try:
+        # imap() keeps the results in the order of the jobs
+        results = list(pool.imap(runJob, jobs))
+    finally:
+        pool.close()
+        pool.join()
+
+    printSummary(results, time.time() - start)
+
+    for r in results:
+        if r['error']:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
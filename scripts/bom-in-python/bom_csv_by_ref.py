@@ -6,44 +6,48 @@
 
 from __future__ import print_function
 
-# Import the KiCad python helper module and the csv formatter
+# Import the KiCad python helper module and the BOM writers
 import kicad_netlist_reader
-import csv
+import kicad_bom_writer as bom
 import sys
 
-# Generate an instance of a generic netlist, and load the netlist tree from
-# the command line option. If the file doesn't exist, execution will stop
-net = kicad_netlist_reader.netlist(sys.argv[1])
-
-# Open a file to write to, if the file cannot be opened output to stdout
-# instead
-try:
-    f = open(sys.argv[2], 'w')
-except IOError:
-    print(__file__, ":", e, file=sys.stderr)
-    f = stdout
-
-# Create a new csv writer object to use as the output formatter, although we
-# are created a tab delimited list instead!
-out = csv.writer(f, lineterminator='\n', delimiter='\t', quoting=csv.QUOTE_NONE)
-
-# override csv.writer's writerow() to support utf8 encoding:
-def writerow( acsvwriter, columns ):
-    utf8row = []
-    for col in columns:
-        utf8row.append( str(col).encode('utf8') )
-    acsvwriter.writerow( utf8row )
-
-components = net.getInterestingComponents()
-
-# Output a field delimited header line
-writerow( out, ['Source:', net.getSource()] )
-writerow( out, ['Date:', net.getDate()] )
-writerow( out, ['Tool:', net.getTool()] )
-writerow( out, ['Component Count:', len(components)] )
-writerow( out, ['Ref', 'Value', 'Part', 'Documentation', 'Description', 'Vendor'] )
-
-# Output all of the component information
-for c in components:
-    writerow( out, [c.getRef(), c.getValue(), c.getLibName() + ":" + c.getPartName(),
-        c.getDatasheet(), c.getDescription(), c.getField("Vendor")])
+
+# The columns of the BOM, one row per component
+columns = [
+    ('Ref', bom.getRefs),
+    ('Value', bom.getValue),
+    ('Part', bom.getLibPart),
+    ('Documentation', bom.getDatasheet),
+    ('Description', bom.getDescription),
+    bom.fieldColumn('Vendor'),
+    ]
+
+# The file extension of the output of this script
+extension = ".csv"
+
+
+def writeBOM(net, f):
+    """Write the BOM of the loaded netlist net to the open file f"""
+    components = net.getInterestingComponents()
+
+    # Although this is the csv script, we create a tab delimited list!
+    out = bom.tsvWriter(f)
+    out.begin(net, len(components))
+    out.table(columns, bom.componentRows(net, columns, components))
+    out.end()
+
+
+if __name__ == '__main__':
+    # Generate an instance of a generic netlist, and load the netlist tree from
+    # the command line option. If the file doesn't exist, execution will stop
+    net = kicad_netlist_reader.netlist(sys.argv[1])
+
+    # Open a file to write to, if the file cannot be opened output to stdout
+    # instead
+    try:
+        f = open(sys.argv[2], 'w')
+    except IOError as e:
+        print(__file__, ":", e, file=sys.stderr)
+        f = sys.stdout
+
+    writeBOM(net, f)
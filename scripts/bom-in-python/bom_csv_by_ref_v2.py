@@ -6,44 +6,48 @@
 
 from __future__ import print_function
 
-# Import the KiCad python helper module
+# Import the KiCad python helper module and the BOM writers
 import kicad_netlist_reader
+import kicad_bom_writer as bom
 import csv
 import sys
 
-# Generate an instance of a generic netlist, and load the netlist tree from
-# the command line option. If the file doesn't exist, execution will stop
-net = kicad_netlist_reader.netlist(sys.argv[1])
-
-# Open a file to write to, if the file cannot be opened output to stdout
-# instead
-try:
-    f = open(sys.argv[2], 'w')
-except IOError:
-    print(__file__, ":", e, file=sys.stderr)
-    f = stdout
-
-# Create a new csv writer object to use as the output formatter
-out = csv.writer(f, lineterminator='\n', delimiter=',', quotechar="\"", quoting=csv.QUOTE_ALL)
-
-# override csv.writer's writerow() to support utf8 encoding:
-def writerow( acsvwriter, columns ):
-    utf8row = []
-    for col in columns:
-        utf8row.append( str(col).encode('utf8') )
-    acsvwriter.writerow( utf8row )
-
-components = net.getInterestingComponents()
-
-# Output a field delimited header line
-writerow( out, ['Source:', net.getSource()] )
-writerow( out, ['Date:', net.getDate()] )
-writerow( out, ['Tool:', net.getTool()] )
-writerow( out, ['Component Count:', len(components)] )
-writerow( out, ['Ref', 'Value', 'Footprint', 'Datasheet', 'Manufacturer', 'Vendor'] )
-
-# Output all of the component information (One component per row)
-for c in components:
-    writerow( out, [c.getRef(), c.getValue(), c.getFootprint(), c.getDatasheet(),
-        c.getField("Manufacturer"), c.getField("Vendor")])
 
+# The columns of the BOM, one row per component
+columns = [
+    ('Ref', bom.getRefs),
+    ('Value', bom.getValue),
+    ('Footprint', bom.getFootprint),
+    ('Datasheet', bom.getDatasheet),
+    bom.fieldColumn('Manufacturer'),
+    bom.fieldColumn('Vendor'),
+    ]
+
+# The file extension of the output of this script
+extension = ".csv"
+
+
+def writeBOM(net, f):
+    """Write the BOM of the loaded netlist net to the open file f"""
+    components = net.getInterestingComponents()
+
+    out = bom.csvWriter(f, quoting=csv.QUOTE_ALL)
+    out.begin(net, len(components))
+    out.table(columns, bom.componentRows(net, columns, components))
+    out.end()
+
+
+if __name__ == '__main__':
+    # Generate an instance of a generic netlist, and load the netlist tree from
+    # the command line option. If the file doesn't exist, execution will stop
+    net = kicad_netlist_reader.netlist(sys.argv[1])
+
+    # Open a file to write to, if the file cannot be opened output to stdout
+    # instead
+    try:
+        f = open(sys.argv[2], 'w')
+    except IOError as e:
+        print(__file__, ":", e, file=sys.stderr)
+        f = sys.stdout
+
+    writeBOM(net, f)
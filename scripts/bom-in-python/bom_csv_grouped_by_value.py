@@ -6,128 +6,62 @@
 
 from __future__ import print_function
 
-# Import the KiCad python helper module and the csv formatter
+# Import the KiCad python helper module and the BOM writers
 import kicad_netlist_reader
-import csv
+import kicad_bom_writer as bom
 import sys
 
 
-if len(sys.argv) != 3:
-    print("Usage ", __file__, "<generic_netlist.xml> <output.csv>", file=sys.stderr)
-    sys.exit(1)
+# The file extension of the output of this script
+extension = ".csv"
 
 
-# Generate an instance of a generic netlist, and load the netlist tree from
-# the command line option. If the file doesn't exist, execution will stop
-net = kicad_netlist_reader.netlist(sys.argv[1])
-
-# Open a file to write to, if the file cannot be opened output to stdout
-# instead
-try:
-    f = open(sys.argv[2], 'w')
-except IOError:
-    print(__file__, ":", e, file=sys.stderr)
-    f = stdout
-
-# subset the components to those wanted in the BOM, controlled
-# by <configure> block in kicad_netlist_reader.py
-components = net.getInterestingComponents()
-
-compfields = net.gatherComponentFieldUnion(components)
-partfields = net.gatherLibPartFieldUnion()
-
-# remove Reference, Value, Datasheet, and Footprint, they will come from 'columns' below
-partfields -= set( ['Reference', 'Value', 'Datasheet', 'Footprint'] )
-
-columnset = compfields | partfields     # union
-
-# prepend an initial 'hard coded' list and put the enchillada into list 'columns'
-columns = ['Item', 'Qty', 'Reference(s)', 'Value', 'LibPart', 'Footprint', 'Datasheet'] + sorted(list(columnset))
-
-# Create a new csv writer object to use as the output formatter
-out = csv.writer(f, lineterminator='\n', delimiter=',', quotechar='\"', quoting=csv.QUOTE_MINIMAL)
-
-# override csv.writer's writerow() to support utf8 encoding:
-def writerow( acsvwriter, columns ):
-    utf8row = []
-    for col in columns:
-        utf8row.append( str(col).encode('utf8') )
-    acsvwriter.writerow( utf8row )
-
-# Output a set of rows as a header providing general information
-writerow( out, ['Source:', net.getSource()] )
-writerow( out, ['Date:', net.getDate()] )
-writerow( out, ['Tool:', net.getTool()] )
-writerow( out, ['Component Count:', len(components)] )
-writerow( out, [] )
-writerow( out, ['Individual Components:'] )
-writerow( out, [] )                        # blank line
-writerow( out, columns )
-
-# Output all the interesting components individually first:
-row = []
-for c in components:
-    del row[:]
-    row.append('')                                      # item is blank in individual table
-    row.append('')                                      # Qty is always 1, why print it
-    row.append( c.getRef() )                            # Reference
-    row.append( c.getValue() )                          # Value
-    row.append( c.getLibName() + ":" + c.getPartName() ) # LibPart
-    #row.append( c.getDescription() )
-    row.append( c.getFootprint() )
-    row.append( c.getDatasheet() )
-
-    # from column 7 upwards, use the fieldnames to grab the data
-    for field in columns[7:]:
-        row.append( c.getField( field ) );
-
-    writerow( out, row )
-
-
-writerow( out, [] )                        # blank line
-writerow( out, [] )                        # blank line
-writerow( out, [] )                        # blank line
-
-writerow( out, ['Collated Components:'] )
-writerow( out, [] )                        # blank line
-writerow( out, columns )                   # reuse same columns
-
-
-
-# Get all of the components in groups of matching parts + values
-# (see kicad_netlist_reader.py)
-grouped = net.groupComponents(components)
-
-
-# Output component information organized by group, aka as collated:
-item = 0
-for group in grouped:
-    del row[:]
-    refs = ""
-
-    # Add the reference of every component in the group and keep a reference
-    # to the component so that the other data can be filled in once per group
-    for component in group:
-        if len(refs) > 0:
-            refs += ", "
-        refs += component.getRef()
-        c = component
-
-    # Fill in the component groups common data
-    # columns = ['Item', 'Qty', 'Reference(s)', 'Value', 'LibPart', 'Footprint', 'Datasheet'] + sorted(list(columnset))
-    item += 1
-    row.append( item )
-    row.append( len(group) )
-    row.append( refs );
-    row.append( c.getValue() )
-    row.append( c.getLibName() + ":" + c.getPartName() )
-    row.append( net.getGroupFootprint(group) )
-    row.append( net.getGroupDatasheet(group) )
-
-    # from column 7 upwards, use the fieldnames to grab the data
-    for field in columns[7:]:
-        row.append( net.getGroupField(group, field) );
-
-    writerow( out,  row  )
-
-f.close()
+def writeBOM(net, f):
+    """Write the BOM of the loaded netlist net to the open file f"""
+    # subset the components to those wanted in the BOM, controlled
+    # by <configure> block in kicad_netlist_reader.py
+    components = net.getInterestingComponents()
+
+    # the 'hard coded' columns, followed by every field in use
+    fields = bom.fieldColumns(net, components)
+    collated = bom.standard_columns + fields
+
+    # in the individual table, item is blank and Qty is always 1, why print it
+    individual = [('Item', bom.getBlank), ('Qty', bom.getBlank)] + \
+        bom.standard_columns[2:] + fields
+
+    out = bom.csvWriter(f)
+    out.begin(net, len(components))
+
+    # Output all the interesting components individually first:
+    out.table(individual, bom.componentRows(net, individual, components),
+              'Individual Components:')
+
+    # Get all of the components in groups of matching parts + values
+    # (see kicad_netlist_reader.py) and output them, aka as collated:
+    grouped = net.groupComponents(components)
+    out.table(collated, bom.groupRows(net, collated, grouped),
+              'Collated Components:')
+    out.end()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage ", __file__, "<generic_netlist.xml> <output.csv>", file=sys.stderr)
+        sys.exit(1)
+
+    # Generate an instance of a generic netlist, and load the netlist tree from
+    # the command line option. If the file doesn't exist, execution will stop
+    net = kicad_netlist_reader.netlist(sys.argv[1])
+
+    # Open a file to write to, if the file cannot be opened output to stdout
+    # instead
+    try:
+        f = open(sys.argv[2], 'w')
+    except IOError as e:
+        print(__file__, ":", e, file=sys.stderr)
+        f = sys.stdout
+
+    writeBOM(net, f)
+
+    f.close()
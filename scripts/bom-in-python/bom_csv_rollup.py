@@ -0,0 +1,100 @@
+#
+# Example python script to generate a single purchasing BOM from the KiCad
+# generic netlists of several boards
+#
+# Example: CSV BOM rolled up across boards and build quantities
+#
+# Each netlist may be followed by ':' and the number of boards to build,
+# by default 1.  Components are grouped by value, footprint and manufacturer
+# part number (the "MPN" field), see kicad_netlist_reader.rollup_key, and the
+# quantity needed for each board is listed after the total.
+#
+# Usage: python bom_csv_rollup.py <output.csv> <netlist.xml>[:<count>] ...
+#
+
+from __future__ import print_function
+
+# Import the KiCad python helper module and the BOM writers
+import kicad_netlist_reader
+import kicad_bom_writer as bom
+import os
+import sys
+
+
+def parseBoard(arg):
+    """Return the (netlist file name, build count) given as name[:count]"""
+    fname, sep, count = arg.rpartition(':')
+    if sep and count.isdigit():
+        return fname, int(count)
+    return arg, 1
+
+
+def getTotal(rollup, group, item):
+    return group.quantity
+
+def keyColumn(title, index):
+    def getKey(rollup, group, item):
+        return group.key[index]
+    return (title, getKey)
+
+def boardColumn(title, name):
+    def getBoardQty(rollup, group, item):
+        qty = group.getBoardQuantity(name)
+        if qty is None:
+            return ''
+        return qty
+    return (title, getBoardQty)
+
+
+def boardTitles(names):
+    """Return the column title of each board: its file name without the
+    extension, or its relative path when several boards share a file name"""
+    bases = [os.path.splitext(os.path.basename(name))[0] for name in names]
+    titles = []
+    for name, base in zip(names, bases):
+        if bases.count(base) > 1:
+            base = os.path.splitext(os.path.relpath(name))[0]
+        titles.append(base)
+    return titles
+
+
+def writeRollup(rollup, f):
+    """Write the BOM of the bomRollup 'rollup' to the open file f"""
+    columns = [('Item', bom.getItem), ('Qty', getTotal)]
+    for index, title in enumerate(kicad_netlist_reader.rollup_key):
+        columns.append(keyColumn(title, index))
+    titles = boardTitles([name for name, count in rollup.boards])
+    for (name, count), title in zip(rollup.boards, titles):
+        columns.append(boardColumn(title + ' x' + str(count), name))
+
+    out = bom.csvWriter(f)
+    out.table(columns, bom.groupRows(rollup, columns, rollup.getGroups()))
+    out.end()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage ", __file__, "<output.csv> <generic_netlist.xml>[:<count>] ...",
+              file=sys.stderr)
+        sys.exit(1)
+
+    # Stream each netlist in turn, only its components' keys and references
+    # are kept.  If a file doesn't exist, or is given twice, execution will stop
+    try:
+        rollup = kicad_netlist_reader.rollupNetlists(
+            [parseBoard(arg) for arg in sys.argv[2:]])
+    except ValueError as e:
+        print(__file__, ":", e, file=sys.stderr)
+        sys.exit(1)
+
+    # Open a file to write to, if the file cannot be opened output to stdout
+    # instead
+    try:
+        f = open(sys.argv[1], 'w')
+    except IOError as e:
+        print(__file__, ":", e, file=sys.stderr)
+        f = sys.stdout
+
+    writeRollup(rollup, f)
+
+    f.close()
@@ -6,120 +6,74 @@
 
 from __future__ import print_function
 
-# Import the KiCad python helper module and the csv formatter
+# Import the KiCad python helper module and the BOM writers
 import kicad_netlist_reader
+import kicad_bom_writer as bom
+import kicad_value_parser
 import sys
 
-# Start with a basic html template
-html = """
-<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
-    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
-<html xmlns="http://www.w3.org/1999/xhtml">
-    <head>
-        <meta http-equiv="Content-Type" content="text/html; charset=utf-8" />
-        <title>KiCad BOM Example 5</title>
-    </head>
-    <body>
-    <h1><!--SOURCE--></h1>
-    <p><!--DATE--></p>
-    <p><!--TOOL--></p>
-    <p><!--COMPCOUNT--></p>
-    <table>
-    <!--TABLEROW-->
-    </table>
-    </body>
-</html>
-    """
 
-def myEqu(self, other):
-    """myEqu is a more advanced equivalence function for components which is
-    used by component grouping. Normal operation is to group components based
-    on their Value, Library source, and Library part.
+def myKey(c):
+    """myKey is a more advanced grouping key for components which is used by
+    component grouping. Normal operation is to group components based on their
+    Value, Library source, and Library part.
 
-    In this example of a more advanced equivalency operator we also compare the
-    custom fields Voltage, Tolerance and Manufacturer as well as the assigned
+    In this example of a more advanced grouping key we also use the custom
+    fields Voltage, Tolerance and Manufacturer as well as the assigned
     footprint. If these fields are not used in some parts they will simply be
-    ignored (they will match as both will be empty strings).
+    ignored (they will match as both will be empty strings).  Values are
+    compared once normalized, so that 4k7 and 4.7K resistors are grouped
+    together (see kicad_value_parser.py).
 
     """
-    result = True
-    if self.getValue() != other.getValue():
-        result = False
-    elif self.getLibName() != other.getLibName():
-        result = False
-    elif self.getPartName() != other.getPartName():
-        result = False
-    elif self.getFootprint() != other.getFootprint():
-        result = False
-    elif self.getField("Tolerance") != other.getField("Tolerance"):
-        result = False
-    elif self.getField("Manufacturer") != other.getField("Manufacturer"):
-        result = False
-    elif self.getField("Voltage") != other.getField("Voltage"):
-        result = False
-
-    return result
-
-# Override the component equivalence operator - it is important to do this
-# before loading the netlist, otherwise all components will have the original
-# equivalency operator.
-kicad_netlist_reader.comp.__equ__ = myEqu
-
-# Generate an instance of a generic netlist, and load the netlist tree from
-# video.xml. If the file doesn't exist, execution will stop
-net = kicad_netlist_reader.netlist(sys.argv[1])
-
-# Open a file to write too, if the file cannot be opened output to stdout
-# instead
-try:
-    f = open(sys.argv[2], 'w')
-except IOError:
-    print(__file__, ":", e, file=sys.stderr)
-    f = stdout
-
-components = net.getInterestingComponents()
-
-# Output a set of rows for a header providing general information
-html = html.replace('<!--SOURCE-->', net.getSource())
-html = html.replace('<!--DATE-->', net.getDate())
-html = html.replace('<!--TOOL-->', net.getTool())
-html = html.replace('<!--COMPCOUNT-->', "<b>Component Count:</b>" + \
-    str(len(components)))
-
-row  = "<tr><th style='width:640px'>Ref</th>" + "<th>Qnty</th>"
-row += "<th>Value</th>" + "<th>Part</th>"
-row +=  "<th>Description</th>"
-#row +=  "<th>Datasheet</th>"
-row += "<th>PartNumber</th>" + "<th>Vendor</th></tr>"
-
-html = html.replace('<!--TABLEROW-->', row + "<!--TABLEROW-->")
-
-# Get all of the components in groups of matching parts + values
-# (see kicad_netlist_reader.py)
-grouped = net.groupComponents(components)
-
-# Output all of the component information
-for group in grouped:
-    refs = ""
-
-    # Add the reference of every component in the group and keep a reference
-    # to the component so that the other data can be filled in once per group
-    for component in group:
-        if len(refs) > 0:
-            refs += ", "
-        refs += component.getRef()
-        c = component
-
-    row = "<tr><td>" + refs +"</td><td>" + str(len(group))
-    row += "</td><td>" + c.getValue() + "</td><td>"
-    row += c.getLibName() + ":" + c.getPartName() + "</td><td>"
-    #row += c.getDatasheet() + "</td><td>"
-    row += c.getDescription() + "</td><td>"
-    row += c.getField("PartNumber") + "</td><td>"
-    row += c.getField("Vendor")
-    row += "</td></tr>"
-
-    html = html.replace('<!--TABLEROW-->', row + "<!--TABLEROW-->")
-
-# Print the formatted html to output file
-print(html, file=f)
+    return (kicad_value_parser.canonicalValue(c), c.getLibName(), c.getPartName(),
+            c.getFootprint(), c.getField("Tolerance"),
+            c.getField("Manufacturer"), c.getField("Voltage"))
+
+
+# The columns of the BOM, one row per group of components
+columns = [
+    ('Ref', bom.getRefs),
+    ('Qnty', bom.getQty),
+    ('Value', bom.getValue),
+    ('Part', bom.getLibPart),
+    ('Description', bom.getDescription),
+    bom.fieldColumn('PartNumber'),
+    bom.fieldColumn('Vendor'),
+    ]
+
+# The style of the headers of the columns
+styles = {'Ref': 'width:640px'}
+
+# The file extension of the output of this script
+extension = ".html"
+
+
+def writeBOM(net, f):
+    """Write the BOM of the loaded netlist net to the open file f"""
+    components = net.getInterestingComponents()
+
+    # Get all of the components in groups of matching parts + values
+    # (see kicad_netlist_reader.py)
+    grouped = net.groupComponents(components, myKey)
+
+    out = bom.htmlWriter(f, "KiCad BOM Example 5", styles)
+    out.begin(net, len(components))
+    out.table(columns, bom.groupRows(net, columns, grouped))
+    out.end()
+
+
+if __name__ == '__main__':
+    # Generate an instance of a generic netlist, and load the netlist tree from
+    # video.xml. If the file doesn't exist, execution will stop
+    net = kicad_netlist_reader.netlist(sys.argv[1])
+
+    # Open a file to write too, if the file cannot be opened output to stdout
+    # instead
+    try:
+        f = open(sys.argv[2], 'w')
+    except IOError as e:
+        print(__file__, ":", e, file=sys.stderr)
+        f = sys.stdout
+
+    writeBOM(net, f)
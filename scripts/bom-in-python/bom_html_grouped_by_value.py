@@ -6,80 +6,55 @@
 
 from __future__ import print_function
 
-# Import the KiCad python helper module and the csv formatter
+# Import the KiCad python helper module and the BOM writers
 import kicad_netlist_reader
+import kicad_bom_writer as bom
 import sys
 
-# Start with a basic html template
-html = """
-<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
-    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
-<html xmlns="http://www.w3.org/1999/xhtml">
-    <head>
-        <meta http-equiv="Content-Type" content="text/html; charset=utf-8" />
-    </head>
-    <body>
-    <h1><!--SOURCE--></h1>
-    <p><!--DATE--></p>
-    <p><!--TOOL--></p>
-    <p><!--COMPCOUNT--></p>
-    <table>
-    <!--TABLEROW-->
-    </table>
-    </body>
-</html>
-    """
 
-# Generate an instance of a generic netlist, and load the netlist tree from
-# the command line option. If the file doesn't exist, execution will stop
-net = kicad_netlist_reader.netlist(sys.argv[1])
+# The columns of the BOM, one row per group of components
+columns = [
+    ('Ref', bom.getRefRanges),
+    ('Qnty', bom.getQty),
+    ('Value', bom.getValue),
+    ('Part', bom.getLibPart),
+    ('Datasheet', bom.getDatasheet),
+    ('Description', bom.getDescription),
+    bom.fieldColumn('Vendor'),
+    ]
 
-# Open a file to write to, if the file cannot be opened output to stdout
-# instead
-try:
-    f = open(sys.argv[2], 'w')
-except IOError:
-    print(__file__, ":", e, file=sys.stderr)
-    f = stdout
+# The style of the headers of the columns
+styles = {'Ref': 'width:640px'}
 
-components = net.getInterestingComponents()
+# The file extension of the output of this script
+extension = ".html"
 
-# Output a set of rows for a header providing general information
-html = html.replace('<!--SOURCE-->', net.getSource())
-html = html.replace('<!--DATE-->', net.getDate())
-html = html.replace('<!--TOOL-->', net.getTool())
-html = html.replace('<!--COMPCOUNT-->', "<b>Component Count:</b>" + \
-    str(len(components)))
 
-row = "<tr><th style='width:640px'>Ref</th>" + "<th>Qnty</th>"
-row += "<th>Value</th>" + "<th>Part</th>" + "<th>Datasheet</th>"
-row += "<th>Description</th>" + "<th>Vendor</th></tr>"
+def writeBOM(net, f):
+    """Write the BOM of the loaded netlist net to the open file f"""
+    components = net.getInterestingComponents()
 
-html = html.replace('<!--TABLEROW-->', row + "<!--TABLEROW-->")
+    # Get all of the components in groups of matching parts + values
+    # (see kicad_netlist_reader.py)
+    grouped = net.groupComponents(components)
 
-# Get all of the components in groups of matching parts + values
-# (see kicad_netlist_reader.py)
-grouped = net.groupComponents(components)
+    out = bom.htmlWriter(f, styles=styles)
+    out.begin(net, len(components))
+    out.table(columns, bom.groupRows(net, columns, grouped))
+    out.end()
 
-# Output all of the component information
-for group in grouped:
-    refs = ""
 
-    # Add the reference of every component in the group and keep a reference
-    # to the component so that the other data can be filled in once per group
-    for component in group:
-        if len(refs) > 0:
-            refs += ", "
-        refs += component.getRef()
-        c = component
+if __name__ == '__main__':
+    # Generate an instance of a generic netlist, and load the netlist tree from
+    # the command line option. If the file doesn't exist, execution will stop
+    net = kicad_netlist_reader.netlist(sys.argv[1])
 
-    row = "<tr><td>" + refs +"</td><td>" + str(len(group))
-    row += "</td><td>" + c.getValue() + "</td><td>" + c.getLibName() + ":"
-    row += c.getPartName() + "</td><td>" + c.getDatasheet() + "</td><td>"
-    row += c.getDescription() + "</td><td>" + c.getField("Vendor")
-    row += "</td></tr>"
+    # Open a file to write to, if the file cannot be opened output to stdout
+    # instead
+    try:
+        f = open(sys.argv[2], 'w')
+    except IOError as e:
+        print(__file__, ":", e, file=sys.stderr)
+        f = sys.stdout
 
-    html = html.replace('<!--TABLEROW-->', row + "<!--TABLEROW-->")
-
-# Print the formatted html to the file
-print(html, file=f)
+    writeBOM(net, f)
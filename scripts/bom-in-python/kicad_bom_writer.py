@@ -0,0 +1,334 @@
+#
+# KiCad python module for writing Bills of materials from generic netlists
+# loaded with kicad_netlist_reader.py
+#
+# A BOM is made of tables.  The rows of a table are generated lazily, one
+# per component or per group of components, from a list of columns, and are
+# passed one at a time to a writer which streams them straight to the output
+# file.  Writers exist for CSV, TSV, HTML and JSON, see 'writers' below.
+#
+# A column is a (title, getter) pair.  getter is called as
+# getter(net, group, item) and returns the value of the cell for a group of
+# components (a list, holding a single component when writing one row per
+# component), where item is the number of the row, starting at 1.
+#
+
+from __future__ import print_function
+import csv
+import json
+import sys
+from xml.sax.saxutils import escape
+
+try:
+    _text_types = (str, unicode)
+except NameError:
+    # python 3
+    _text_types = (str,)
+
+
+def _text(value):
+    """Return value as text"""
+    if isinstance(value, _text_types):
+        return value
+    return str(value)
+
+
+#-----<Columns>-------------------------------------------------------------------
+
+def getBlank(net, group, item):
+    return ''
+
+def getItem(net, group, item):
+    return item
+
+def getQty(net, group, item):
+    return len(group)
+
+def getRefs(net, group, item):
+    return ", ".join([c.getRef() for c in group])
+
+def getRefRanges(net, group, item):
+    # e.g. "R1-R8, R12", see kicad_netlist_reader.compressRefs()
+    return net.getGroupRefs(group)
+
+def getValue(net, group, item):
+    return group[0].getValue()
+
+def getLibPart(net, group, item):
+    return group[0].getLibName() + ":" + group[0].getPartName()
+
+def getFootprint(net, group, item):
+    return net.getGroupFootprint(group)
+
+def getDatasheet(net, group, item):
+    return net.getGroupDatasheet(group)
+
+def getDescription(net, group, item):
+    return group[0].getDescription()
+
+
+def fieldColumn(name, title=None):
+    """Return a column holding the field called name, taken from the first
+    component of the group which has it, or from the libpart"""
+    def getField(net, group, item):
+        return net.getGroupField(group, name)
+    return (title or name, getField)
+
+
+def fieldColumns(net, components):
+    """Return a column for each field found in any of the components or in
+    any libpart, sorted by name, except those already in standard_columns
+    and those matching kicad_netlist_reader.excluded_fields.
+    """
+    compfields = net.gatherComponentFieldUnion(components)
+    partfields = net.gatherLibPartFieldUnion()
+
+    # Reference, Value, Datasheet, and Footprint come from standard_columns
+    partfields -= set( ['Reference', 'Value', 'Datasheet', 'Footprint'] )
+
+    return [fieldColumn(name) for name in sorted(compfields | partfields)]
+
+
+# The columns of the common, grouped, BOM
+standard_columns = [
+    ('Item', getItem),
+    ('Qty', getQty),
+    ('Reference(s)', getRefRanges),
+    ('Value', getValue),
+    ('LibPart', getLibPart),
+    ('Footprint', getFootprint),
+    ('Datasheet', getDatasheet),
+    ]
+
+#-----</Columns>------------------------------------------------------------------
+
+
+def groupRows(net, columns, groups):
+    """Generate the row of cells of each group of components in turn
+
+    Keywords:
+    net -- the netlist the groups come from
+    columns -- the list of (title, getter) of the columns of the table
+    groups -- a list or iterable of component lists, as returned by
+              netlist.groupComponents()
+    """
+    getters = [getter for title, getter in columns]
+    item = 0
+    for group in groups:
+        item += 1
+        yield [_text(getter(net, group, item)) for getter in getters]
+
+
+def componentRows(net, columns, components):
+    """Generate the row of cells of each component in turn, see groupRows()"""
+    return groupRows(net, columns, ([c] for c in components))
+
+
+class bomWriter():
+    """Base class of the writers.  A writer is created for an open file, then
+    begin(), table() for each table, and end() are called in turn.
+    """
+    # The file extension of the output of the writer
+    extension = ".txt"
+
+    def __init__(self, f):
+        self.f = f
+        self.tables = 0
+
+    def begin(self, net, count):
+        """Write the start of the document, including general information
+        about the netlist net.  count is the number of components listed."""
+        pass
+
+    def table(self, columns, rows, title=None):
+        """Write a table, streaming each row of 'rows' to the file as it is
+        generated.
+
+        Keywords:
+        columns -- the list of (title, getter) of the columns of the table
+        rows -- an iterable of lists of cells, see groupRows()
+        title -- the title of the table, if any
+        """
+        self.tables += 1
+
+    def end(self):
+        """Write the end of the document"""
+        pass
+
+
+class csvWriter(bomWriter):
+    """Writes comma separated values, one line per row, with the general
+    information first."""
+    extension = ".csv"
+
+    def __init__(self, f, **fmtparams):
+        bomWriter.__init__(self, f)
+        params = {'lineterminator': '\n', 'delimiter': ',', 'quotechar': '\"',
+                  'quoting': csv.QUOTE_MINIMAL}
+        params.update(fmtparams)
+        self.out = csv.writer(f, **params)
+
+    if sys.version_info[0] < 3:
+        def writerow(self, cells):
+            # the python 2 csv module can only write byte strings
+            self.out.writerow([_text(cell).encode('utf8') for cell in cells])
+    else:
+        def writerow(self, cells):
+            self.out.writerow(cells)
+
+    def begin(self, net, count):
+        self.writerow(['Source:', net.getSource()])
+        self.writerow(['Date:', net.getDate()])
+        self.writerow(['Tool:', net.getTool()])
+        self.writerow(['Component Count:', count])
+
+    def table(self, columns, rows, title=None):
+        if self.tables:
+            self.writerow([])
+            self.writerow([])
+        bomWriter.table(self, columns, rows, title)
+
+        if title:
+            self.writerow([])
+            self.writerow([title])
+            self.writerow([])
+
+        self.writerow([t for t, getter in columns])
+        for row in rows:
+            self.writerow(row)
+
+
+class tsvWriter(csvWriter):
+    """Writes tab separated values, without any quoting"""
+    extension = ".tsv"
+
+    def __init__(self, f, **fmtparams):
+        params = {'delimiter': '\t', 'quoting': csv.QUOTE_NONE,
+                  'escapechar': '\\'}
+        params.update(fmtparams)
+        csvWriter.__init__(self, f, **params)
+
+
+class htmlWriter(bomWriter):
+    """Writes an XHTML document, with a table element for each table
+
+    Keywords:
+    f -- the open file to write to
+    title -- the title of the document, if any
+    styles -- a {column title: CSS style} dict of the styles of the headers
+              of the columns, e.g. {'Ref': 'width:640px'} (Optional)
+    """
+    extension = ".html"
+
+    def __init__(self, f, title=None, styles=None):
+        bomWriter.__init__(self, f)
+        self.title = title
+        self.styles = styles or {}
+
+    def begin(self, net, count):
+        title = ""
+        if self.title is not None:
+            title = "        <title>" + escape(self.title) + "</title>\n"
+        self.f.write("""<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml">
+    <head>
+        <meta http-equiv="Content-Type" content="text/html; charset=utf-8" />
+""" + title + """    </head>
+    <body>
+    <h1>""" + escape(net.getSource()) + """</h1>
+    <p>""" + escape(net.getDate()) + """</p>
+    <p>""" + escape(net.getTool()) + """</p>
+    <p><b>Component Count:</b>""" + str(count) + """</p>
+""")
+
+    def table(self, columns, rows, title=None):
+        bomWriter.table(self, columns, rows, title)
+        write = self.f.write
+
+        if title:
+            write("    <h2>" + escape(title) + "</h2>\n")
+
+        write("    <table>\n    <tr>")
+        for t, getter in columns:
+            style = self.styles.get(t)
+            if style:
+                write("<th style='" + escape(style, {"'": "&apos;"}) + "'>" + escape(t)
+                      + "</th>")
+            else:
+                write("<th>" + escape(t) + "</th>")
+        write("</tr>\n")
+
+        for row in rows:
+            write("    <tr><td>" + "</td><td>".join([escape(cell) for cell in row])
+                  + "</td></tr>\n")
+
+        write("    </table>\n")
+
+    def end(self):
+        self.f.write("""    </body>
+</html>
+""")
+
+
+class jsonWriter(bomWriter):
+    """Writes a JSON object holding the general information and a list of
+    tables, each with its title, column titles and list of rows."""
+    extension = ".json"
+
+    def begin(self, net, count):
+        write = self.f.write
+        write('{\n')
+        write('  "source": ' + json.dumps(net.getSource()) + ',\n')
+        write('  "date": ' + json.dumps(net.getDate()) + ',\n')
+        write('  "tool": ' + json.dumps(net.getTool()) + ',\n')
+        write('  "component_count": ' + json.dumps(count) + ',\n')
+        write('  "tables": [')
+
+    def table(self, columns, rows, title=None):
+        write = self.f.write
+        if self.tables:
+            write(',')
+        bomWriter.table(self, columns, rows, title)
+
+        write('\n    {\n')
+        write('      "title": ' + json.dumps(title) + ',\n')
+        write('      "columns": ' + json.dumps([t for t, getter in columns]) + ',\n')
+        write('      "rows": [')
+        separator = '\n        '
+        for row in rows:
+            write(separator + json.dumps(row))
+            separator = ',\n        '
+        write('\n      ]\n    }')
+
+    def end(self):
+        self.f.write('\n  ]\n}\n')
+
+
+# The writers, by name
+writers = {
+    'csv': csvWriter,
+    'tsv': tsvWriter,
+    'html': htmlWriter,
+    'json': jsonWriter,
+    }
+
+
+def writeBOM(net, f, writer='csv', key=None):
+    """Write the common BOM of a netlist: the interesting components grouped,
+    by default, by value and libpart, with the standard_columns followed by a
+    column for each field in use.
+
+    Keywords:
+    net -- the loaded netlist
+    f -- the open file to write to
+    writer -- the name of the writer to use, see 'writers'
+    key -- the grouping key function, see netlist.groupComponents()
+    """
+    components = net.getInterestingComponents()
+    columns = standard_columns + fieldColumns(net, components)
+
+    out = writers[writer](f)
+    out.begin(net, len(components))
+    out.table(columns, groupRows(net, columns, net.groupComponents(components, key)))
+    out.end()
@@ -0,0 +1,273 @@
+#
+# KiCad python module for comparing two revisions of a generic netlist, e.g.
+# to write the report of an engineering change order.
+#
+# Components are matched by reference (or by timestamp, to follow components
+# which have been re-annotated) and nets by name.  Each side is indexed in a
+# dict once, and each component is reduced to a tuple of its properties which
+# is compared as a whole, so the time taken grows linearly with the size of
+# the netlists.  The changes are gathered in a netlistDiff, which can be
+# written as JSON for other tools, or as a text report.
+#
+# Usage: python kicad_netlist_diff.py [--tstamp] <old.xml> <new.xml> [<changes.json>]
+#
+# The exit status is 0 if the netlists are the same and 1 if they differ,
+# as with diff.
+#
+
+from __future__ import print_function
+
+import json
+import sys
+
+import kicad_netlist_reader
+
+
+def componentProperties(c, match="ref"):
+    """Return the tuple of (name, value) of the properties of component c
+    which are compared: its value, footprint, datasheet, libpart and own
+    fields, followed by its timestamp, or by its reference when components
+    are matched by timestamp.
+    """
+    props = [
+        ("Value", c.getValue()),
+        ("Footprint", c.getFootprint()),
+        ("Datasheet", c.getDatasheet()),
+        ("LibPart", c.getLibName() + ":" + c.getPartName()),
+        ]
+
+    # sorted, so that fields listed in a different order still compare equal
+    for name in sorted(c.getFieldNames()):
+        props.append((name, c.getField(name, False)))
+
+    if match == "ref":
+        props.append(("tstamp", c.getTimestamp()))
+    else:
+        props.append(("Reference", c.getRef()))
+
+    return tuple(props)
+
+
+def _componentKey(c, match):
+    if match == "tstamp":
+        # components without a timestamp can only be matched by reference
+        return c.getTimestamp() or c.getRef()
+    return c.getRef()
+
+
+def _indexComponents(net, match):
+    """Return a {key: (component, properties)} dict of the components of net,
+    and the list of keys in netlist order"""
+    index = {}
+    order = []
+    for c in net.components:
+        key = _componentKey(c, match)
+        if key not in index:
+            index[key] = (c, componentProperties(c, match))
+            order.append(key)
+    return index, order
+
+
+def _indexNets(net):
+    """Return a {net name: tuple of (ref, pin)} dict of the nets of net, and
+    the list of net names in netlist order"""
+    names = net.getNetNames()
+    index = {}
+    for name in names:
+        index[name] = tuple(net.getNetNodes(name))
+    return index, names
+
+
+def _nodeSortKey(node):
+    return (kicad_netlist_reader.refSortKey(node[0]), node[1])
+
+
+class netlistDiff():
+    """The changes between two revisions of a netlist, see diffNetlists().
+
+    components_added, components_removed -- lists of the properties, as a
+        dict, of the components only found in the new, or old, netlist
+    components_changed -- a list of (ref, {property: (old, new)}) of the
+        components found in both netlists whose properties differ
+    nets_added, nets_removed -- lists of (net name, sorted list of (ref, pin))
+        of the nets only found in the new, or old, netlist
+    nets_changed -- a list of (net name, nodes added, nodes removed) of the
+        nets found in both netlists whose nodes differ
+    """
+    def __init__(self):
+        self.components_added = []
+        self.components_removed = []
+        self.components_changed = []
+        self.nets_added = []
+        self.nets_removed = []
+        self.nets_changed = []
+
+    def isEmpty(self):
+        """Return True if the netlists are the same"""
+        return not (self.components_added or self.components_removed or
+                    self.components_changed or self.nets_added or
+                    self.nets_removed or self.nets_changed)
+
+    def asDict(self):
+        """Return the changes as a dict of lists, dicts and strings, which can
+        be written as JSON"""
+        def nodes(nodeList):
+            return [{"ref": ref, "pin": pin} for ref, pin in nodeList]
+
+        changed = []
+        for ref, changes in self.components_changed:
+            props = {}
+            for name, (old, new) in changes.items():
+                props[name] = {"old": old, "new": new}
+            changed.append({"ref": ref, "changes": props})
+
+        return {
+            "components": {
+                "added": self.components_added,
+                "removed": self.components_removed,
+                "changed": changed,
+                },
+            "nets": {
+                "added": [{"name": name, "nodes": nodes(n)}
+                          for name, n in self.nets_added],
+                "removed": [{"name": name, "nodes": nodes(n)}
+                            for name, n in self.nets_removed],
+                "changed": [{"name": name, "added": nodes(added),
+                             "removed": nodes(removed)}
+                            for name, added, removed in self.nets_changed],
+                },
+            }
+
+    def writeJSON(self, f):
+        """Write the changes as JSON to the open file f"""
+        json.dump(self.asDict(), f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    def writeText(self, f):
+        """Write the changes as a human readable report to the open file f"""
+        write = f.write
+
+        for props in self.components_added:
+            write("+ " + props["Reference"] + "  " + props["Value"] + "  " +
+                  props["Footprint"] + "\n")
+        for props in self.components_removed:
+            write("- " + props["Reference"] + "  " + props["Value"] + "  " +
+                  props["Footprint"] + "\n")
+        for ref, changes in self.components_changed:
+            for name in sorted(changes):
+                old, new = changes[name]
+                write("~ " + ref + "  " + name + ": " + old + " -> " + new + "\n")
+
+        def nodes(nodeList):
+            return " ".join([ref + "/" + pin for ref, pin in nodeList])
+
+        for name, n in self.nets_added:
+            write("+ net " + name + "  " + nodes(n) + "\n")
+        for name, n in self.nets_removed:
+            write("- net " + name + "  " + nodes(n) + "\n")
+        for name, added, removed in self.nets_changed:
+            if added:
+                write("~ net " + name + "  + " + nodes(added) + "\n")
+            if removed:
+                write("~ net " + name + "  - " + nodes(removed) + "\n")
+
+
+def _propertyDict(c, props):
+    ret = dict(props)
+    ret["Reference"] = c.getRef()
+    return ret
+
+
+def diffNetlists(old, new, match="ref"):
+    """Return the netlistDiff between two loaded netlists.
+
+    Keywords:
+    old, new -- the kicad_netlist_reader.netlist of each revision
+    match -- "ref" to match components by reference, or "tstamp" to match
+             them by timestamp, in which case a change of reference is
+             reported as a change of their "Reference" property
+    """
+    diff = netlistDiff()
+    sortKey = kicad_netlist_reader.refSortKey
+
+    # Components
+    oldIndex, oldOrder = _indexComponents(old, match)
+    newIndex, newOrder = _indexComponents(new, match)
+
+    for key in newOrder:
+        c, props = newIndex[key]
+        previous = oldIndex.get(key)
+        if previous is None:
+            diff.components_added.append(_propertyDict(c, props))
+        elif previous[1] != props:
+            oldProps = dict(previous[1])
+            newProps = dict(props)
+            changes = {}
+            for name in set(oldProps) | set(newProps):
+                before = oldProps.get(name, "")
+                after = newProps.get(name, "")
+                if before != after:
+                    changes[name] = (before, after)
+            diff.components_changed.append((c.getRef(), changes))
+
+    for key in oldOrder:
+        if key not in newIndex:
+            c, props = oldIndex[key]
+            diff.components_removed.append(_propertyDict(c, props))
+
+    diff.components_added.sort(key=lambda p: sortKey(p["Reference"]))
+    diff.components_removed.sort(key=lambda p: sortKey(p["Reference"]))
+    diff.components_changed.sort(key=lambda change: sortKey(change[0]))
+
+    # Nets
+    oldNets, oldNames = _indexNets(old)
+    newNets, newNames = _indexNets(new)
+
+    for name in newNames:
+        nodes = newNets[name]
+        previous = oldNets.get(name)
+        if previous is None:
+            diff.nets_added.append((name, sorted(nodes, key=_nodeSortKey)))
+        elif previous != nodes:
+            # most nets keep their nodes in the same order, only build sets
+            # for those which do not
+            nodes = set(nodes)
+            previous = set(previous)
+            if nodes != previous:
+                diff.nets_changed.append((name,
+                    sorted(nodes - previous, key=_nodeSortKey),
+                    sorted(previous - nodes, key=_nodeSortKey)))
+
+    for name in oldNames:
+        if name not in newNets:
+            diff.nets_removed.append((name,
+                sorted(oldNets[name], key=_nodeSortKey)))
+
+    return diff
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    match = "ref"
+    if args and args[0] == "--tstamp":
+        match = "tstamp"
+        args = args[1:]
+
+    if len(args) not in (2, 3):
+        print("Usage ", __file__, "[--tstamp] <old.xml> <new.xml> [<changes.json>]",
+              file=sys.stderr)
+        sys.exit(2)
+
+    diff = diffNetlists(kicad_netlist_reader.netlist(args[0]),
+                        kicad_netlist_reader.netlist(args[1]), match)
+
+    if len(args) == 3:
+        f = open(args[2], 'w')
+        diff.writeJSON(f)
+        f.close()
+    else:
+        diff.writeText(sys.stdout)
+
+    if diff.isEmpty():
+        sys.exit(0)
+    sys.exit(1)
@@ -8,8 +8,14 @@
 #
 
 from __future__ import print_function
+import json
+import marshal
+import os
+import struct
 import sys
+import time
 import xml.sax as sax
+from xml.sax.saxutils import escape, quoteattr
 import re
 import pdb
 
@@ -30,7 +36,7 @@ excluded_fields = [
 #
 # 1) adding a custom field named "Installed" to your components and filling it
 # with a value of "NU" (Normally Uninstalled).
-# See netlist.getInterestingComponents(), or
+# See netlist.getInterestingComponents() and excluded_predicates below, or
 #
 # 2) blacklisting it in any of the three following lists:
 
@@ -58,26 +64,148 @@ excluded_footprints = [
     #'MOUNTHOLE'
     ]
 
+
+def isNormallyUninstalled(component):
+    """This is a fairly personal way to flag DNS (Do Not Stuff).  NU for me
+    means Normally Uninstalled."""
+    return component.getField("Installed") == 'NU'
+
+
+# functions which are given a component and return True if it is to be
+# excluded from the BOM.  You can add your own to this list.
+excluded_predicates = [
+    isNormallyUninstalled
+    ]
+
 #-----</Configure>---------------------------------------------------------------
 
 
-class xmlElement():
+# Element and attribute names repeat throughout a netlist, only one copy of
+# each distinct name is kept, see _internName().
+_names = {}
+
+def _internName(name):
+    """Return the shared copy of the string name"""
+    return _names.setdefault(name, name)
+
+class _readOnlyDict(dict):
+    """A dict which cannot be modified"""
+    def _readOnly(self, *args, **kwargs):
+        raise TypeError("read only dict")
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = \
+        update = _readOnly
+
+# Shared, read only, empty attributes and children, used internally in place
+# of those of elements which have none.
+_no_attributes = _readOnlyDict()
+_no_children = ()
+
+
+def _materializing(base, slot, names):
+    """Return a subclass of the container type base, standing in for the
+    empty attributes or children of an element.  Instances start empty and
+    are bound to an element: the first change made to one is made to the
+    element, by storing the instance in its slot, so the real dict or list
+    is only created once something is added to it.
+    """
+    def wrap(name):
+        method = getattr(base, name)
+        def change(self, *args, **kwargs):
+            target = getattr(self._element, slot)
+            if target is None:
+                setattr(self._element, slot, self)
+                target = self
+            return method(target, *args, **kwargs)
+        change.__name__ = name
+        return change
+
+    namespace = {"__slots__": ("_element",)}
+    for name in names:
+        if hasattr(base, name):
+            namespace[name] = wrap(name)
+
+    def __init__(self, element):
+        base.__init__(self)
+        self._element = element
+    namespace["__init__"] = __init__
+
+    return type("_pending" + base.__name__.capitalize(), (base,), namespace)
+
+_pendingDict = _materializing(dict, "_attributes",
+    ("__setitem__", "__delitem__", "__ior__", "clear", "pop", "popitem",
+     "setdefault", "update"))
+_pendingList = _materializing(list, "_children",
+    ("__setitem__", "__delitem__", "__iadd__", "__imul__", "__setslice__",
+     "__delslice__", "append", "extend", "insert", "pop", "remove", "reverse",
+     "sort"))
+
+
+class _chunkedWriter():
+    """Gathers the many small strings making up a document, passing them on
+    to the file-like object f in chunks of about chunk_size characters.
+    """
+    def __init__(self, f, chunk_size=65536):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.pieces = []
+        self.size = 0
+
+    def write(self, s):
+        self.pieces.append(s)
+        self.size += len(s)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Pass everything gathered so far on to f"""
+        if self.pieces:
+            self.f.write("".join(self.pieces))
+            del self.pieces[:]
+            self.size = 0
+
+
+class xmlElement(object):
     """xml element which can represent all nodes of the netlist tree.  It can be
     used to easily generate various output formats by propogating format
     requests to children recursively.
+
+    Large netlists hold hundreds of thousands of these, so they are kept
+    small: there is no per instance __dict__, names are shared, and the
+    attributes dict and children list are only created once something is
+    added to them.
     """
+    __slots__ = ('name', 'parent', 'chars', '_attributes', '_children')
+
     def __init__(self, name, parent=None):
-        self.name = name
-        self.attributes = {}
+        self.name = _internName(name)
         self.parent = parent
         self.chars = ""
-        self.children = []
+        self._attributes = None
+        self._children = None
+
+    @property
+    def attributes(self):
+        """The dict of attributes of this element.  For an element without
+        attributes, an empty dict which becomes the attributes of the element
+        once something is added to it."""
+        if self._attributes is None:
+            return _pendingDict(self)
+        return self._attributes
+
+    @property
+    def children(self):
+        """The list of child elements of this element.  For an element
+        without children, an empty list which becomes the children of the
+        element once something is added to it."""
+        if self._children is None:
+            return _pendingList(self)
+        return self._children
 
     def __str__(self):
         """String representation of this netlist element
 
         """
-        return self.name + "[" + self.chars + "]" + " attr_count:" + str(len(self.attributes))
+        return self.name + "[" + self.chars + "]" + " attr_count:" + str(len(self._attributes or _no_attributes))
 
     def formatXML(self, nestLevel=0, amChild=False):
         """Return this element formatted as XML
@@ -87,35 +215,55 @@ class xmlElement():
         amChild -- If set to True, the start of document is not returned.
 
         """
-        s = ""
+        pieces = []
+        self._writeXML(pieces.append, nestLevel, amChild)
+        return "".join(pieces)
+
+    def writeXML(self, f, nestLevel=0, amChild=False):
+        """Write this element formatted as XML to the file-like object f,
+        followed by a newline.  The output is passed on to f in large chunks
+        as it is generated, so the document is never held in memory as a
+        whole.
 
-        indent = ""
-        for i in range(nestLevel):
-            indent += "    "
+        Keywords:
+        f -- The file-like object to write to
+        nestLevel -- increases by one for each level of nesting.
+        amChild -- If set to True, the start of document is not written.
+
+        """
+        out = _chunkedWriter(f)
+        self._writeXML(out.write, nestLevel, amChild)
+        out.write("\n")
+        out.flush()
+
+    def _writeXML(self, write, nestLevel, amChild):
+        """Pass this element formatted as XML, piece by piece, to the function
+        write"""
+        indent = "    " * nestLevel
+        attributes = self._attributes or _no_attributes
+        children = self._children or _no_children
 
         if not amChild:
-            s = "<?xml version=\"1.0\" encoding=\"utf-8\"?>\n"
+            write("<?xml version=\"1.0\" encoding=\"utf-8\"?>\n")
 
-        s += indent + "<" + self.name
-        for a in self.attributes:
-            s += " " + a + "=\"" + self.attributes[a] + "\""
+        write(indent + "<" + self.name)
+        for a in attributes:
+            write(" " + a + "=" + quoteattr(attributes[a]))
 
-        if (len(self.chars) == 0) and (len(self.children) == 0):
-            s += "/>"
+        if (len(self.chars) == 0) and (len(children) == 0):
+            write("/>")
         else:
-            s += ">" + self.chars
+            write(">" + escape(self.chars))
 
-        for c in self.children:
-            s += "\n"
-            s += c.formatXML(nestLevel+1, True)
+        for c in children:
+            write("\n")
+            c._writeXML(write, nestLevel+1, True)
 
-        if (len(self.children) > 0):
-            s += "\n" + indent
+        if (len(children) > 0):
+            write("\n" + indent)
 
-        if (len(self.children) > 0) or (len(self.chars) > 0):
-            s += "</" + self.name + ">"
-
-        return s
+        if (len(children) > 0) or (len(self.chars) > 0):
+            write("</" + self.name + ">")
 
     def formatHTML(self, amChild=False):
         """Return this element formatted as HTML
@@ -124,10 +272,32 @@ class xmlElement():
         amChild -- If set to True, the start of document is not returned
 
         """
-        s = ""
+        pieces = []
+        self._writeHTML(pieces.append, amChild)
+        return "".join(pieces)
+
+    def writeHTML(self, f, amChild=False):
+        """Write this element formatted as HTML to the file-like object f,
+        followed by a newline.  As for writeXML(), the output is passed on to
+        f in large chunks as it is generated.
+
+        Keywords:
+        f -- The file-like object to write to
+        amChild -- If set to True, the start of document is not written
+
+        """
+        out = _chunkedWriter(f)
+        self._writeHTML(out.write, amChild)
+        out.write("\n")
+        out.flush()
+
+    def _writeHTML(self, write, amChild):
+        """Pass this element formatted as HTML, piece by piece, to the function
+        write"""
+        attributes = self._attributes or _no_attributes
 
         if not amChild:
-            s = """<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+            write("""<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
                 "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
                 <html xmlns="http://www.w3.org/1999/xhtml">
                 <head>
@@ -136,34 +306,34 @@ class xmlElement():
                 </head>
                 <body>
                 <table>
-                """
+                """)
 
-        s += "<tr><td><b>" + self.name + "</b><br>" + self.chars + "</td><td><ul>"
-        for a in self.attributes:
-            s += "<li>" + a + " = " + self.attributes[a] + "</li>"
+        write("<tr><td><b>" + self.name + "</b><br>" + escape(self.chars) + "</td><td><ul>")
+        for a in attributes:
+            write("<li>" + a + " = " + escape(attributes[a]) + "</li>")
 
-        s += "</ul></td></tr>\n"
+        write("</ul></td></tr>\n")
 
-        for c in self.children:
-            s += c.formatHTML(True)
+        for c in self._children or _no_children:
+            c._writeHTML(write, True)
 
         if not amChild:
-            s += """</table>
+            write("""</table>
                 </body>
-                </html>"""
-
-        return s
+                </html>""")
 
     def addAttribute(self, attr, value):
         """Add an attribute to this element"""
-        self.attributes[attr] = value
+        if self._attributes is None:
+            self._attributes = {}
+        self._attributes[_internName(attr)] = value
 
     def setAttribute(self, attr, value):
         """Set an attributes value - in fact does the same thing as add
         attribute
 
         """
-        self.attributes[attr] = value
+        self.addAttribute(attr, value)
 
     def setChars(self, chars):
         """Set the characters for this element"""
@@ -175,8 +345,11 @@ class xmlElement():
 
     def addChild(self, child):
         """Add a child element to this element"""
-        self.children.append(child)
-        return self.children[len(self.children) - 1]
+        if self._children is None:
+            self._children = [child]
+        else:
+            self._children.append(child)
+        return child
 
     def getParent(self):
         """Get the parent of this element (Could be None)"""
@@ -187,21 +360,30 @@ class xmlElement():
 
         Keywords:
         name -- The name of the child element to return"""
-        for child in self.children:
+        for child in self._children or _no_children:
             if child.name == name:
                 return child
         return None
 
     def getChildren(self, name=None):
+        """Return the child elements of this element, or only those named
+        'name'.  Without a name, the returned sequence belongs to the element
+        and must not be modified.
+
+        Keywords:
+        name -- The name of the child elements to return"""
         if name:
             # return _all_ children named "name"
             ret = []
-            for child in self.children:
+            for child in self._children or _no_children:
                 if child.name == name:
                     ret.append(child)
             return ret
+        elif self._children is None:
+            # shared by all the leaves, read only
+            return _no_children
         else:
-            return self.children
+            return self._children
 
     def get(self, elemName, attribute="", attrmatch=""):
         """Return the text data for either an attribute or an xmlElement
@@ -209,23 +391,412 @@ class xmlElement():
         if (self.name == elemName):
             if attribute != "":
                 try:
+                    attributes = self._attributes or _no_attributes
                     if attrmatch != "":
-                        if self.attributes[attribute] == attrmatch:
+                        if attributes[attribute] == attrmatch:
                             return self.chars
                     else:
-                        return self.attributes[attribute]
+                        return attributes[attribute]
                 except AttributeError:
                     return ""
             else:
                 return self.chars
 
-        for child in self.children:
+        for child in self._children or _no_children:
             ret = child.get(elemName, attribute, attrmatch)
             if ret != "":
                 return ret
 
         return ""
 
+    def select(self, path, index=None):
+        """Generate the elements, or attribute values, selected by the path
+        expression 'path' relative to this element, see selector"""
+        return select(self, path, index)
+
+
+
+#-----<Selectors>-----------------------------------------------------------------
+
+# The parts of a selector path, see selector
+_selector_step = re.compile(r"\s*(//|/)?\s*(@?)([\w.:-]+|\*)")
+_selector_predicate = re.compile(
+    r"\[\s*@([\w.:-]+)\s*(?:=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\]]*?)))?\s*\]")
+
+
+def _childElements(element, name, index):
+    """Return the children of element named name, or all of them if name is
+    None, using and filling in the dict 'index' of {element: {name:
+    [children]}} if it is not None"""
+    if index is None:
+        if name is None:
+            return element._children or _no_children
+        return [c for c in element._children or _no_children if c.name == name]
+
+    if name is None:
+        return element._children or _no_children
+
+    byName = index.get(element)
+    if byName is None:
+        byName = {}
+        for c in element._children or _no_children:
+            children = byName.get(c.name)
+            if children is None:
+                byName[c.name] = [c]
+            else:
+                children.append(c)
+        index[element] = byName
+    return byName.get(name, _no_children)
+
+
+def _descendants(element):
+    """Generate the elements below element, depth first in document order"""
+    stack = list(reversed(element._children or _no_children))
+    while stack:
+        e = stack.pop()
+        yield e
+        if e._children:
+            stack.extend(reversed(e._children))
+
+
+class selector():
+    """A compiled path expression selecting elements of a netlist tree, see
+    select().  A path is a list of steps separated by '/', each step being
+    the name of the child elements to select, or '*' for all of them,
+    optionally followed by conditions on their attributes: [@name] for those
+    which have the attribute, [@name=value] for those where it has the given
+    value.  Values holding '/' or ']' must be quoted.  '//' instead of '/'
+    selects any descendant rather than the children.  The last step may be
+    @name to select the value of that attribute rather than the elements.
+
+    For example, from the root of a netlist:
+        libparts/libpart[@lib=device]/fields/field[@name=MPN]
+        components/comp[@ref=R1]//field
+        nets/net/node[@ref=U1]/@pin
+    """
+    def __init__(self, path):
+        self.path = path
+
+        # a (descendant, name, conditions) tuple for each step, name being
+        # None for '*' and conditions a list of (attribute, value or None)
+        self.steps = []
+
+        # the attribute selected by the last step, if any
+        self.attribute = None
+
+        pos = 0
+        while pos < len(path) and not path[pos:].isspace():
+            m = _selector_step.match(path, pos)
+            if not m or (self.steps and not m.group(1)) or self.attribute:
+                raise ValueError("invalid selector " + repr(path) +
+                                 " at position " + str(pos))
+            descendant = m.group(1) == "//"
+            name = m.group(3)
+            pos = m.end()
+
+            if m.group(2):
+                if descendant or name == "*":
+                    raise ValueError("invalid selector " + repr(path) +
+                                     " at position " + str(m.start()))
+                self.attribute = name
+                continue
+
+            conditions = []
+            m = _selector_predicate.match(path, pos)
+            while m:
+                value = m.group(2)
+                if value is None:
+                    value = m.group(3)
+                if value is None:
+                    value = m.group(4)
+                conditions.append((m.group(1), value))
+                pos = m.end()
+                m = _selector_predicate.match(path, pos)
+
+            if name == "*":
+                name = None
+            self.steps.append((descendant, name, conditions))
+
+        if not self.steps and not self.attribute:
+            raise ValueError("empty selector " + repr(path))
+
+    def select(self, element, index=None):
+        """Generate the elements, or attribute values, selected from element.
+
+        Keywords:
+        element -- the xmlElement the path is relative to
+        index -- a dict in which the children of each element visited are
+                 indexed by name, to be kept and passed again to speed up
+                 later selections from the same, unmodified, tree
+        """
+        elements = [element]
+        for step in self.steps:
+            elements = self._step(elements, step, index)
+
+        if self.attribute is None:
+            return iter(elements)
+        return self._attributes(elements)
+
+    def _step(self, elements, step, index):
+        descendant, name, conditions = step
+        for e in elements:
+            if descendant:
+                candidates = _descendants(e)
+            else:
+                candidates = _childElements(e, name, index)
+
+            for c in candidates:
+                if descendant and name is not None and c.name != name:
+                    continue
+                if conditions:
+                    attributes = c._attributes or _no_attributes
+                    for attribute, value in conditions:
+                        v = attributes.get(attribute)
+                        if v is None or (value is not None and v != value):
+                            break
+                    else:
+                        yield c
+                else:
+                    yield c
+
+    def _attributes(self, elements):
+        attribute = self.attribute
+        for e in elements:
+            v = (e._attributes or _no_attributes).get(attribute)
+            if v is not None:
+                yield v
+
+
+# The selectors compiled by compileSelector(), by path
+_selectors = {}
+
+
+def compileSelector(path):
+    """Return the selector for path, compiling it only the first time"""
+    s = _selectors.get(path)
+    if s is None:
+        s = selector(path)
+        _selectors[path] = s
+    return s
+
+
+def select(element, path, index=None):
+    """Generate the elements, or attribute values, selected by the path
+    expression 'path' from element, see selector"""
+    return compileSelector(path).select(element, index)
+
+#-----</Selectors>----------------------------------------------------------------
+
+
+def _gatherFields(element, lookups):
+    """Walk the subtree of element once and return a (fields, values) pair of
+    dicts.  'fields' maps the name of each 'field' element to its text.
+    'values' maps (elemName, attribute) to the text (attribute "") or
+    attribute value of an element, for each attribute listed against
+    elemName in the dict 'lookups'.  As with xmlElement.get(), the first non
+    empty value found depth first is the one kept.
+    """
+    fields = {}
+    values = {}
+
+    stack = [element]
+    while stack:
+        e = stack.pop()
+
+        if e.name == "field":
+            name = (e._attributes or _no_attributes).get("name")
+            if e.chars != "" and name is not None and name not in fields:
+                fields[name] = e.chars
+
+        elif e.name in lookups:
+            for attribute in lookups[e.name]:
+                if attribute:
+                    v = (e._attributes or _no_attributes).get(attribute, "")
+                else:
+                    v = e.chars
+                if v != "" and (e.name, attribute) not in values:
+                    values[(e.name, attribute)] = v
+
+        if e._children:
+            stack.extend(reversed(e._children))
+
+    return fields, values
+
+
+# The elements and attributes resolved by _gatherFields() for each libpart
+# and component
+_libpart_lookups = {"description": [""]}
+_comp_lookups = {
+    "value": [""],
+    "footprint": [""],
+    "datasheet": [""],
+    "tstamp": [""],
+    "libsource": ["lib", "part"],
+    }
+
+
+class _anyOf():
+    """Stands in for a compiled regular expression, matching when any one of a
+    list of compiled regular expressions matches."""
+    def __init__(self, compiled):
+        self.compiled = compiled
+
+    def match(self, string):
+        for rex in self.compiled:
+            m = rex.match(string)
+            if m:
+                return m
+        return None
+
+
+def _compileAlternation(patterns):
+    """Return a compiled regular expression whose match() succeeds if any of
+    the regular expressions in 'patterns' match, or None if there are no
+    patterns.  The patterns are merged into a single alternation unless that
+    would change their meaning (groups or inline flags), in which case each
+    is tried in turn.
+    """
+    if not patterns:
+        return None
+
+    compiled = [re.compile(rex) for rex in patterns]
+    if len(compiled) == 1:
+        return compiled[0]
+
+    plain_flags = re.compile("").flags
+    for rex in compiled:
+        if rex.groups or rex.flags != plain_flags:
+            return _anyOf(compiled)
+
+    return re.compile("|".join(["(?:" + rex + ")" for rex in patterns]))
+
+
+class componentFilter():
+    """Decides which components and fields are left out of a BOM.  Each
+    category of regular expressions is compiled once, into a single
+    alternation, so that a component is checked with one match per category,
+    followed by each of the predicates.
+
+    Keywords:
+    references -- regular expressions matching excluded 'Reference' fields
+    values -- regular expressions matching excluded 'Value' fields
+    footprints -- regular expressions matching excluded 'Footprint' fields
+    predicates -- functions given a component, returning True to exclude it
+    fields -- regular expressions matching field names to leave out of the
+              columns of a BOM
+    """
+    def __init__(self, references=None, values=None, footprints=None,
+                 predicates=None, fields=None):
+        self.references = _compileAlternation(references or [])
+        self.values = _compileAlternation(values or [])
+        self.footprints = _compileAlternation(footprints or [])
+        self.predicates = list(predicates or [])
+        self.fields = _compileAlternation(fields or [])
+
+    def excludes(self, c):
+        """Return True if the component c is to be left out"""
+        if self.references and self.references.match(c.getRef()):
+            return True
+        if self.values and self.values.match(c.getValue()):
+            return True
+        if self.footprints and self.footprints.match(c.getFootprint()):
+            return True
+        for predicate in self.predicates:
+            if predicate(c):
+                return True
+        return False
+
+    def excludesField(self, name):
+        """Return True if the field called name is to be left out"""
+        return bool(self.fields and self.fields.match(name))
+
+    def filter(self, components):
+        """Return a list of the components which are not excluded"""
+        excludes = self.excludes
+        return [c for c in components if not excludes(c)]
+
+
+# The componentFilter built from the <Configure> lists, and what the lists
+# held at the time, see getDefaultFilter()
+_default_filter = None
+_default_filter_key = None
+
+
+def getDefaultFilter():
+    """Return a componentFilter built from the excluded_* lists at the top of
+    this module.  The filter is reused until one of the lists is changed.
+    """
+    global _default_filter, _default_filter_key
+
+    key = (tuple(excluded_references), tuple(excluded_values),
+           tuple(excluded_footprints), tuple(excluded_predicates),
+           tuple(excluded_fields))
+
+    if key != _default_filter_key:
+        _default_filter = componentFilter(excluded_references, excluded_values,
+            excluded_footprints, excluded_predicates, excluded_fields)
+        _default_filter_key = key
+
+    return _default_filter
+
+
+_digits = re.compile(r"(\d+)")
+_numbered_ref = re.compile(r"^(.*?)(\d+)$")
+
+
+def refSortKey(ref):
+    """Return a key sorting references naturally, so that R2 comes before R10:
+    the text and numbers of the reference alternate, with numbers as ints.
+    """
+    parts = _digits.split(ref)
+    for i in range(1, len(parts), 2):
+        parts[i] = int(parts[i])
+    return tuple(parts)
+
+
+def _appendRefRun(items, run):
+    """Append a run of consecutive references, see compressRefs(), to items"""
+    prefix, first, last, first_ref, last_ref = run
+    if last - first >= 2:
+        items.append(first_ref + "-" + last_ref)
+    elif last > first:
+        items.append(first_ref)
+        items.append(last_ref)
+    else:
+        items.append(first_ref)
+
+
+def compressRefs(refs):
+    """Return the references in the naturally sorted list 'refs' as a single
+    string, with runs of three or more consecutive references written as a
+    range, e.g. "R1-R8, R12".
+    """
+    items = []
+
+    # the run being built: [prefix, first number, last number, first ref, last ref]
+    run = None
+
+    for ref in refs:
+        m = _numbered_ref.match(ref)
+        if m and run and m.group(1) == run[0] and int(m.group(2)) == run[2] + 1:
+            run[2] += 1
+            run[4] = ref
+            continue
+
+        if run:
+            _appendRefRun(items, run)
+
+        if m:
+            number = int(m.group(2))
+            run = [m.group(1), number, number, ref, ref]
+        else:
+            run = None
+            items.append(ref)
+
+    if run:
+        _appendRefRun(items, run)
+
+    return ", ".join(items)
 
 
 class libpart():
@@ -238,6 +809,18 @@ class libpart():
         #
         self.element = xml_element
 
+        # fields and values of the element, resolved on first use
+        self._fields = None
+        self._values = None
+
+    def _resolveFields(self):
+        self._fields, self._values = _gatherFields(self.element, _libpart_lookups)
+
+    def invalidateFields(self):
+        """Forget the resolved fields, call after modifying the element"""
+        self._fields = None
+        self._values = None
+
     #def __str__(self):
         # simply print the xmlElement associated with this part
         #return str(self.element)
@@ -249,10 +832,14 @@ class libpart():
         return self.element.get("libpart", "part")
 
     def getDescription(self):
-        return self.element.get("description")
+        if self._values is None:
+            self._resolveFields()
+        return self._values.get(("description", ""), "")
 
     def getField(self, name):
-        return self.element.get("field", "name", name)
+        if self._fields is None:
+            self._resolveFields()
+        return self._fields.get(name, "")
 
     def getFieldNames(self):
         """Return a list of field names in play for this libpart.
@@ -293,6 +880,13 @@ class comp():
         self.element = xml_element
         self.libpart = None
 
+        # fields and values of the element, resolved on first use
+        self._fields = None
+        self._values = None
+
+        # see getRefSortKey()
+        self._refKey = None
+
         # Set to true when this component is included in a component group
         self.grouped = False
 
@@ -305,6 +899,27 @@ class comp():
                     result = True
         return result
 
+    def _resolveFields(self):
+        self._fields, self._values = _gatherFields(self.element, _comp_lookups)
+
+    def _getValue(self, elemName, attribute=""):
+        if self._values is None:
+            self._resolveFields()
+        return self._values.get((elemName, attribute), "")
+
+    def invalidateFields(self):
+        """Forget the resolved fields, call after modifying the element"""
+        self._fields = None
+        self._values = None
+
+    def getGroupKey(self):
+        """Return the key used by netlist.groupComponents() to group this
+        component with equivalent ones: the value, library and part.  Like
+        __eq__ this can be easily overloaded, or netlist.groupComponents()
+        may be given a key function instead.
+        """
+        return (self.getValue(), self.getLibName(), self.getPartName())
+
     def setLibPart(self, part):
         self.libpart = part
 
@@ -312,19 +927,20 @@ class comp():
         return self.libpart
 
     def getPartName(self):
-        return self.element.get("libsource", "part")
+        return self._getValue("libsource", "part")
 
     def getLibName(self):
-        return self.element.get("libsource", "lib")
+        return self._getValue("libsource", "lib")
 
     def setValue(self, value):
         """Set the value of this component"""
         v = self.element.getChild("value")
         if v:
             v.setChars(value)
+            self.invalidateFields()
 
     def getValue(self):
-        return self.element.get("value")
+        return self._getValue("value")
 
     def getField(self, name, libraryToo=True):
         """Return the value of a field named name. The component is first
@@ -338,8 +954,11 @@ class comp():
                         in component itself
         """
 
-        field = self.element.get("field", "name", name)
-        if field == "" and libraryToo:
+        if self._fields is None:
+            self._resolveFields()
+
+        field = self._fields.get(name, "")
+        if field == "" and libraryToo and self.libpart:
             field = self.libpart.getField(name)
         return field
 
@@ -359,56 +978,162 @@ class comp():
     def getRef(self):
         return self.element.get("comp", "ref")
 
+    def getRefSortKey(self):
+        """Return the key sorting this component naturally by reference, see
+        refSortKey()"""
+        if self._refKey is None:
+            self._refKey = refSortKey(self.getRef())
+        return self._refKey
+
     def getFootprint(self, libraryToo=True):
-        ret = self.element.get("footprint")
-        if ret =="" and libraryToo:
+        ret = self._getValue("footprint")
+        if ret =="" and libraryToo and self.libpart:
             ret = self.libpart.getFootprint()
         return ret
 
     def getDatasheet(self, libraryToo=True):
-        ret = self.element.get("datasheet")
-        if ret == '' and libraryToo:
+        ret = self._getValue("datasheet")
+        if ret == '' and libraryToo and self.libpart:
             ret = self.libpart.getDatasheet()
         return ret
 
     def getTimestamp(self):
-        return self.element.get("tstamp")
+        return self._getValue("tstamp")
 
     def getDescription(self):
+        if not self.libpart:
+            return ""
         return self.libpart.getDescription()
 
 
+class diagnostic():
+    """A problem found while loading a netlist.
+
+    severity -- "error", or "warning" for what does not affect the BOM
+    code -- what kind of problem it is: "io-error", "parse-error",
+            "missing-libpart", "duplicate-ref", "unknown-tag" or
+            "misplaced-tag"
+    message -- the description of the problem
+    line -- the line of the netlist file it was found at, if known
+    ref -- the reference of the component concerned, if any
+    """
+    def __init__(self, severity, code, message, line=None, ref=None):
+        self.severity = severity
+        self.code = code
+        self.message = message
+        self.line = line
+        self.ref = ref
+
+    def __str__(self):
+        ret = self.severity + ": " + self.message + " [" + self.code + "]"
+        if self.line is not None:
+            ret = "line " + str(self.line) + ": " + ret
+        return ret
+
+    def asDict(self):
+        """Return the diagnostic as a dict, which can be written as JSON"""
+        return {"severity": self.severity, "code": self.code,
+                "message": self.message, "line": self.line, "ref": self.ref}
+
+
+class netlistError(Exception):
+    """Base class of the exceptions raised while loading a netlist with
+    errors="raise".  'diagnostics' holds every diagnostic found up to and
+    including the one which caused the exception."""
+    def __init__(self, message, diagnostics=None):
+        Exception.__init__(self, message)
+        if diagnostics is None:
+            diagnostics = []
+        self.diagnostics = diagnostics
+
+
+class netlistFileError(netlistError):
+    """The netlist file could not be read"""
+
+
+class netlistParseError(netlistError):
+    """The netlist file is not well formed XML"""
+
+
 class netlist():
     """ Kicad generic netlist class. Generally loaded from a kicad generic
     netlist file. Includes several helper functions to ease BOM creating
     scripts
 
     """
-    def __init__(self, fname=""):
+    def __init__(self, fname="", cache=False, log=None, errors="exit"):
         """Initialiser for the genericNetlist class
 
         Keywords:
         fname -- The name of the generic netlist file to open (Optional)
+        cache -- If set to True, use a cache file next to the netlist file,
+                 see load()
+        log -- A stageLog recording the time taken by, and the counts of, each
+               stage of the loading and processing of the netlist.  Defaults
+               to default_log, so nothing is recorded unless it is set.
+        errors -- What to do about problems found while loading the netlist.
+                  With "exit", unreadable files end the program and missing
+                  libparts are printed.  With "raise", the structure of the
+                  netlist is checked as it is parsed, nothing is printed and
+                  nothing ends the program: unreadable or malformed files
+                  raise a netlistFileError or netlistParseError.  In both
+                  modes, the other problems, such as missing libparts and
+                  duplicate references, are gathered in self.diagnostics.
 
         """
+        if log is None:
+            log = default_log
+        self.log = log
+
+        if errors not in ("exit", "raise"):
+            raise ValueError("errors must be \"exit\" or \"raise\", not " +
+                             repr(errors))
+        self.errors = errors
+
+        # The diagnostic of each problem found while loading, in both modes
+        self.diagnostics = []
+
         self.design = None
         self.components = []
         self.libparts = []
         self.libraries = []
         self.nets = []
 
+        # (lib, part) and (lib, alias) keys to libpart, filled in as each
+        # libpart element is closed so that endDocument() can link components
+        # in a single pass.
+        self._libpart_index = {}
+
+        # Connectivity index, filled in as each net element is closed.  Nets
+        # are numbered in the order they are first seen: _net_ids maps a net
+        # name to its number, _net_names and _net_nodes hold the name and the
+        # list of (ref, pin) of each net number, and _ref_pins maps each
+        # component reference to a {pin: net number} dict.
+        self._net_ids = {}
+        self._net_names = []
+        self._net_nodes = []
+        self._ref_pins = {}
+
         # The entire tree is loaded into self.tree
         self.tree = []
 
         self._curr_element = None
 
-        # component blacklist regexs, made from exluded_* above.
-        self.excluded_references = []
-        self.excluded_values = []
-        self.excluded_footprints = []
+        # When stream() is running, finished components are handed over
+        # through this list instead of being kept in the tree.
+        self._comp_queue = None
+
+        # The references of the components generated by stream() with
+        # errors="raise", to report duplicates
+        self._stream_refs = None
+
+        # The children of the elements visited by select(), indexed by name,
+        # and the tree they belong to
+        self._select_index = None
+        self._select_tree = None
 
         if fname != "":
-            self.load(fname)
+            self.load(fname, cache)
 
     def addChars(self, content):
         """Add characters to the current element"""
@@ -416,66 +1141,210 @@ class netlist():
 
     def addElement(self, name):
         """Add a new kicad generic element to the list"""
-        if self._curr_element == None:
+        if self._curr_element is None:
             self.tree = xmlElement(name)
             self._curr_element = self.tree
         else:
             self._curr_element = self._curr_element.addChild(
                 xmlElement(name, self._curr_element))
 
-        # If this element is a component, add it to the components list
-        if self._curr_element.name == "comp":
-            self.components.append(comp(self._curr_element))
+        # Elements which are also listed on their own, such as components,
+        # are passed on to their handler
+        handler = self._element_handlers.get(self._curr_element.name)
+        if handler is not None:
+            handler(self, self._curr_element)
 
-        # Assign the design element
-        if self._curr_element.name == "design":
-            self.design = self._curr_element
+        return self._curr_element
 
-        # If this element is a library part, add it to the parts list
-        if self._curr_element.name == "libpart":
-            self.libparts.append(libpart(self._curr_element))
+    def _addComp(self, element):
+        self.components.append(comp(element))
 
-        # If this element is a net, add it to the nets list
-        if self._curr_element.name == "net":
-            self.nets.append(self._curr_element)
+    def _addDesign(self, element):
+        self.design = element
 
-        # If this element is a library, add it to the libraries list
-        if self._curr_element.name == "library":
-            self.libraries.append(self._curr_element)
+    def _addLibPart(self, element):
+        self.libparts.append(libpart(element))
 
-        return self._curr_element
+    def _addNet(self, element):
+        self.nets.append(element)
+
+    def _addLibrary(self, element):
+        self.libraries.append(element)
+
+    # The handler of each kind of element added to a list by addElement()
+    _element_handlers = {
+        "comp": _addComp,
+        "design": _addDesign,
+        "libpart": _addLibPart,
+        "net": _addNet,
+        "library": _addLibrary,
+        }
 
     def endDocument(self):
         """Called when the netlist document has been fully parsed"""
+        if self.log is not None:
+            start = time.time()
+
         # When the document is complete, the library parts must be linked to
         # the components as they are seperate in the tree so as not to
         # duplicate library part information for every component
+        missing = 0
         for c in self.components:
-            for p in self.libparts:
-                if p.getLibName() == c.getLibName():
-                    if p.getPartName() == c.getPartName():
-                        c.setLibPart(p)
-                        break
-                    else:
-                        aliases = p.getAliases()
-                        if aliases and self.aliasMatch( c.getPartName(), aliases ):
-                            c.setLibPart(p)
-                            break;
-
-            if not c.getLibPart():
-                print( 'missing libpart for ref:', c.getRef(), c.getPartName(), c.getLibName() )
-
+            p = self.findLibPart(c)
+            if p:
+                c.setLibPart(p)
+            else:
+                missing += 1
+                self.diagnostics.append(diagnostic("error", "missing-libpart",
+                    "missing libpart " + c.getLibName() + ":" +
+                    c.getPartName() + " for ref " + c.getRef(), ref=c.getRef()))
+                if self.errors == "exit":
+                    print( 'missing libpart for ref:', c.getRef(), c.getPartName(), c.getLibName() )
+
+        seen = set()
+        for c in self.components:
+            ref = c.getRef()
+            if ref in seen:
+                self.diagnostics.append(diagnostic("error", "duplicate-ref",
+                    "duplicate ref " + ref, ref=ref))
+            seen.add(ref)
+
+        if self.log is not None:
+            self.log.record("endDocument", time.time() - start, {
+                "components": len(self.components),
+                "libparts": len(self.libparts),
+                "missing_libparts": missing})
+
+    def findLibPart(self, component):
+        """Return the libpart a component was instantiated from, or None if
+        no such libpart has been read (yet).
+        """
+        return self._libpart_index.get((component.getLibName(),
+                                        component.getPartName()))
+
+    def indexLibPart(self, part):
+        """Add a libpart to the lookup index used to link components to their
+        library part.  The part is indexed under its own name and each of its
+        aliases.  When several libparts claim the same key, the first one
+        indexed wins, as it would have with a linear search of self.libparts.
+        """
+        lib = part.getLibName()
+        self._libpart_index.setdefault((lib, part.getPartName()), part)
 
-    def aliasMatch(self, partName, aliasList):
-        for alias in aliasList:
-            if partName == alias:
-                return True
-        return False
+        aliases = part.getAliases()
+        if aliases:
+            for alias in aliases:
+                self._libpart_index.setdefault((lib, alias), part)
 
     def endElement(self):
         """End the current element and switch to its parent"""
+        # A libpart is complete once its element closes, so index it now
+        if self._curr_element.name == "libpart":
+            self.indexLibPart(self.libparts[-1])
+
+        # When streaming, a complete component is passed on to stream() and
+        # dropped from the tree so that it does not stay in memory
+        elif self._curr_element.name == "comp" and self._comp_queue is not None:
+            c = self.components.pop()
+            if self._stream_refs is not None:
+                ref = c.getRef()
+                if ref in self._stream_refs:
+                    self.diagnostics.append(diagnostic("error", "duplicate-ref",
+                        "duplicate ref " + ref, ref=ref))
+                self._stream_refs.add(ref)
+            self._comp_queue.append(c)
+            self._curr_element.getParent()._children.pop()
+
+        # A net is complete once its element closes, so add its nodes to
+        # the connectivity index
+        elif self._curr_element.name == "net":
+            self.indexNet(self._curr_element)
+
         self._curr_element = self._curr_element.getParent()
 
+    def indexNet(self, net):
+        """Add the nodes of a net element to the connectivity index.  Nets
+        sharing a name are treated as one.
+        """
+        name = (net._attributes or _no_attributes).get("name", "")
+
+        netId = self._net_ids.get(name)
+        if netId is None:
+            netId = len(self._net_names)
+            self._net_ids[name] = netId
+            self._net_names.append(name)
+            self._net_nodes.append([])
+
+        nodes = self._net_nodes[netId]
+        for node in net.getChildren("node"):
+            attributes = node._attributes or _no_attributes
+            ref = attributes.get("ref", "")
+            pin = attributes.get("pin", "")
+            nodes.append((ref, pin))
+
+            pins = self._ref_pins.get(ref)
+            if pins is None:
+                pins = {}
+                self._ref_pins[ref] = pins
+            pins[pin] = netId
+
+    def getNetNames(self):
+        """Return the list of the names of all nets, in netlist order"""
+        return list(self._net_names)
+
+    def getNetNodes(self, netName):
+        """Return the list of (ref, pin) connected to the net named netName,
+        empty if there is no such net"""
+        netId = self._net_ids.get(netName)
+        if netId is None:
+            return []
+        return list(self._net_nodes[netId])
+
+    def getComponentNets(self, ref):
+        """Return a {pin: net name} dict of the connected pins of the
+        component with reference ref"""
+        ret = {}
+        for pin, netId in self._ref_pins.get(ref, _no_attributes).items():
+            ret[pin] = self._net_names[netId]
+        return ret
+
+    def getPinNet(self, ref, pin):
+        """Return the name of the net connected to pin of the component with
+        reference ref, or "" if it is not connected"""
+        netId = self._ref_pins.get(ref, _no_attributes).get(pin)
+        if netId is None:
+            return ""
+        return self._net_names[netId]
+
+    def select(self, path):
+        """Generate the elements, or attribute values, selected by the path
+        expression 'path' relative to the root element of the netlist, e.g.
+        libparts/libpart[@lib=device]/fields/field[@name=MPN], see selector.
+        The children of the elements visited are indexed by name, so that
+        later selections are faster.
+        """
+        if self._select_tree is not self.tree:
+            self._select_index = {}
+            self._select_tree = self.tree
+        if not self.tree:
+            return iter(_no_children)
+        return select(self.tree, path, self._select_index)
+
+    def getErrors(self):
+        """Return the diagnostics of severity "error" """
+        return [d for d in self.diagnostics if d.severity == "error"]
+
+    def _fail(self, exception_class, code, message, line=None):
+        """Record a problem which stops the netlist from being loaded, then
+        raise exception_class (errors="raise") or end the program"""
+        d = diagnostic("error", code, message, line)
+        self.diagnostics.append(d)
+        if self.errors == "raise":
+            raise exception_class(str(d), list(self.diagnostics))
+
+        print( __file__, ":", message, file=sys.stderr )
+        sys.exit(-1)
+
     def getDate(self):
         """Return the date + time string generated by the tree creation tool"""
         return self.design.get("date")
@@ -488,12 +1357,20 @@ class netlist():
         """Return the tool string which was used to create the netlist tree"""
         return self.design.get("tool")
 
-    def gatherComponentFieldUnion(self, components=None):
+    def gatherComponentFieldUnion(self, components=None, compFilter=None):
         """Gather the complete 'set' of unique component fields, fields found in any component.
+
+        Keywords:
+        components -- the components to look at, or None for all of them
+        compFilter -- the componentFilter deciding which fields are left out,
+                      or None for the one built from excluded_fields
         """
         if not components:
             components=self.components
 
+        if not compFilter:
+            compFilter = getDefaultFilter()
+
         s = set()
         for c in components:
             s.update( c.getFieldNames() )
@@ -501,19 +1378,21 @@ class netlist():
         # omit anything matching any regex in excluded_fields
         ret = set()
         for field in s:
-            exclude = False
-            for rex in excluded_fields:
-                if re.match( rex, field ):
-                    exclude = True
-                    break
-            if not exclude:
+            if not compFilter.excludesField(field):
                 ret.add(field)
 
         return ret       # this is a python 'set'
 
-    def gatherLibPartFieldUnion(self):
+    def gatherLibPartFieldUnion(self, compFilter=None):
         """Gather the complete 'set' of part fields, fields found in any part.
+
+        Keywords:
+        compFilter -- the componentFilter deciding which fields are left out,
+                      or None for the one built from excluded_fields
         """
+        if not compFilter:
+            compFilter = getDefaultFilter()
+
         s = set()
         for p in self.libparts:
             s.update( p.getFieldNames() )
@@ -521,120 +1400,102 @@ class netlist():
         # omit anything matching any regex in excluded_fields
         ret = set()
         for field in s:
-            exclude = False
-            for rex in excluded_fields:
-                if re.match( rex, field ):
-                    exclude = True
-                    break
-            if not exclude:
+            if not compFilter.excludesField(field):
                 ret.add(field)
 
         return ret       # this is a python 'set'
 
-    def getInterestingComponents(self):
+    def getInterestingComponents(self, compFilter=None):
         """Return a subset of all components, those that should show up in the BOM.
         Omit those that should not, by consulting the blacklists:
         excluded_values, excluded_refs, and excluded_footprints, which hold one
         or more regular expressions.  If any of the the regular expressions match
         the corresponding field's value in a component, then the component is exluded.
-        """
-
-        # pre-compile all the regex expressions:
-        del self.excluded_references[:]
-        del self.excluded_values[:]
-        del self.excluded_footprints[:]
-
-        for rex in excluded_references:
-            self.excluded_references.append( re.compile( rex ) )
+        Components for which any of the excluded_predicates return True are
+        excluded too.
 
-        for rex in excluded_values:
-            self.excluded_values.append( re.compile( rex ) )
+        Keywords:
+        compFilter -- a componentFilter to use instead of the one built from
+                      the excluded_* lists
+        """
+        if self.log is not None:
+            start = time.time()
 
-        for rex in excluded_footprints:
-            self.excluded_footprints.append( re.compile( rex ) )
+        if not compFilter:
+            compFilter = getDefaultFilter()
 
         # the subset of components to return, considered as "interesting".
-        ret = []
-
-        # run each component thru a series of tests, if it passes all, then add it
-        # to the interesting list 'ret'.
-        for c in self.components:
-            exclude = False
-            if not exclude:
-                for refs in self.excluded_references:
-                    if refs.match(c.getRef()):
-                        exclude = True
-                        break;
-            if not exclude:
-                for vals in self.excluded_values:
-                    if vals.match(c.getValue()):
-                        exclude = True
-                        break;
-            if not exclude:
-                for mods in self.excluded_footprints:
-                    if mods.match(c.getFootprint()):
-                        exclude = True
-                        break;
-
-            if not exclude:
-                # This is a fairly personal way to flag DNS (Do Not Stuff).  NU for
-                # me means Normally Uninstalled.  You can 'or in' another expression here.
-                if c.getField( "Installed" ) == 'NU':
-                    exclude = True
-
-            if not exclude:
-                ret.append(c)
+        ret = compFilter.filter(self.components)
 
         # Sort first by ref as this makes for easier to read BOM's
-        ret.sort(key=lambda g: g.getRef())
+        ret.sort(key=lambda g: g.getRefSortKey())
+
+        if self.log is not None:
+            self.log.record("getInterestingComponents", time.time() - start, {
+                "components": len(self.components),
+                "interesting": len(ret)})
 
         return ret
 
 
-    def groupComponents(self, components = None):
+    def groupComponents(self, components = None, key = None):
         """Return a list of component lists. Components are grouped together
-        when the value, library and part identifiers match.
+        when their keys match, by default when the value, library and part
+        identifiers match (see comp.getGroupKey()).
 
         Keywords:
         components -- is a list of components, typically an interesting subset
         of all components, or None.  If None, then all components are looked at.
+        key -- a function taking a component and returning a hashable key,
+        components with equal keys are grouped together.  If None, then
+        comp.getGroupKey() is used.
+
+        See bomRollup to group the components of several netlists together.
         """
+        if self.log is not None:
+            start = time.time()
+
         if not components:
             components = self.components
 
-        groups = []
+        if key is None:
+            key = lambda c: c.getGroupKey()
 
-        # Make sure to start off will all components ungrouped to begin with
-        for c in components:
-            c.grouped = False
+        groups = []
 
-        # Group components based on the value, library and part identifiers
+        # Group components in a single pass, keeping the groups in the order
+        # they were first seen so that the result is deterministic
+        groupsByKey = {}
         for c in components:
-            if c.grouped == False:
-                c.grouped = True
-                newgroup = []
-                newgroup.append(c)
-
-                # Check every other ungrouped component against this component
-                # and add to the group as necessary
-                for ci in components:
-                    if ci.grouped == False and ci == c:
-                        newgroup.append(ci)
-                        ci.grouped = True
-
-                # Add the new component group to the groups list
-                groups.append(newgroup)
+            k = key(c)
+            group = groupsByKey.get(k)
+            if group is None:
+                group = []
+                groupsByKey[k] = group
+                groups.append(group)
+            group.append(c)
+            c.grouped = True
 
         # Each group is a list of components, we need to sort each list first
         # to get them in order as this makes for easier to read BOM's
         for g in groups:
-            g = sorted(g, key=lambda g: g.getRef())
+            g.sort(key=lambda c: c.getRefSortKey())
+
+        # Finally, sort the groups to order the references naturally
+        groups.sort(key=lambda group: group[0].getRefSortKey())
 
-        # Finally, sort the groups to order the references alphabetically
-        groups = sorted(groups, key=lambda group: group[0].getRef())
+        if self.log is not None:
+            self.log.record("groupComponents", time.time() - start, {
+                "components": len(components),
+                "groups": len(groups)})
 
         return groups
 
+    def getGroupRefs(self, group):
+        """Return the references of a sorted group of components, with runs
+        of consecutive references compressed, e.g. "R1-R8, R12"."""
+        return compressRefs([c.getRef() for c in group])
+
     def getGroupField(self, group, field):
         """Return the whatever is known about the given field by consulting each
         component in the group.  If any of them know something about the property/field,
@@ -644,6 +1505,10 @@ class netlist():
             ret = c.getField(field, False)
             if ret != '':
                 return ret
+
+        # the libpart may be missing, see netlist.diagnostics
+        if not group[0].getLibPart():
+            return ''
         return group[0].getLibPart().getField(field)
 
     def getGroupFootprint(self, group):
@@ -655,6 +1520,9 @@ class netlist():
             ret = c.getFootprint()
             if ret != "":
                 return ret
+
+        if not group[0].getLibPart():
+            return ""
         return group[0].getLibPart().getFootprint()
 
     def getGroupDatasheet(self, group):
@@ -668,6 +1536,8 @@ class netlist():
                 return ret
 
         if len(group) > 0:
+            if not group[0].getLibPart():
+                return ''
             return group[0].getLibPart().getDatasheet()
         else:
             print("NULL!")
@@ -677,25 +1547,542 @@ class netlist():
         """Return the whole netlist formatted in XML"""
         return self.tree.formatXML()
 
+    def writeXML(self, f):
+        """Write the whole netlist formatted in XML to the file-like object f"""
+        self.tree.writeXML(f)
+
     def formatHTML(self):
         """Return the whole netlist formatted in HTML"""
         return self.tree.formatHTML()
 
-    def load(self, fname):
+    def writeHTML(self, f):
+        """Write the whole netlist formatted in HTML to the file-like object f"""
+        self.tree.writeHTML(f)
+
+    def load(self, fname, cache=False):
         """Load a kicad generic netlist
 
         Keywords:
         fname -- The name of the generic netlist file to open
+        cache -- If set to True, the parsed design header, components,
+                 libparts, libraries and nets are saved to a cache file next
+                 to the netlist file (see cacheFileName()), and later loads
+                 of the same, unmodified, netlist read the cache instead of
+                 parsing the XML.  Stale or unreadable cache files are
+                 rebuilt.
 
         """
+        if self.log is None:
+            self._load(fname, cache)
+            return
+
+        start = time.time()
+        cached = self._load(fname, cache)
+        elapsed = time.time() - start
+
+        elements = 0
+        if self.tree:
+            elements = 1 + sum(1 for e in _descendants(self.tree))
+        self.log.record("load", elapsed, {
+            "file": fname,
+            "cached": cached,
+            "elements": elements,
+            "components": len(self.components),
+            "libparts": len(self.libparts),
+            "nets": len(self.nets)})
+
+    def _load(self, fname, cache):
+        """Load the netlist, see load(), and return True if it was read from
+        its cache file"""
+        if cache and self._loadCache(fname):
+            return True
+
+        if self.errors == "raise":
+            handler = _gNetValidatingReader(self)
+        else:
+            handler = _gNetReader(self)
+
+        try:
+            # open the file here, the parser would take a missing file name
+            # for an URL
+            f = open(fname, "rb")
+            try:
+                self._reader = sax.make_parser()
+                self._reader.setContentHandler(handler)
+                self._reader.parse(f)
+            finally:
+                f.close()
+        except IOError as e:
+            self._fail(netlistFileError, "io-error", str(e))
+        except sax.SAXParseException as e:
+            if self.errors != "raise":
+                raise
+            self._fail(netlistParseError, "parse-error", str(e),
+                       e.getLineNumber())
+
+        if cache:
+            self._saveCache(fname)
+        return False
+
+    def _cacheKey(self, fname):
+        """Return what a cache file must have been made from to be valid for
+        the netlist file fname: the cache format, the python version (the
+        marshal format depends on it) and the path, modification time and
+        size of the netlist file.
+        """
+        st = os.stat(fname)
+        return (_cache_format, tuple(sys.version_info[:2]),
+                os.path.abspath(fname), st.st_mtime, st.st_size)
+
+    def _loadCache(self, fname):
+        """Load the netlist from the cache file of fname.  Return False if
+        there is no usable cache file, in which case nothing is loaded.
+        """
+        try:
+            f = open(cacheFileName(fname), "rb")
+        except IOError:
+            return False
+
+        try:
+            try:
+                data = f.read()
+            finally:
+                f.close()
+
+            # the key is read first, so that a stale cache costs little
+            keylen = struct.unpack("<I", data[:4])[0]
+            if marshal.loads(data[4:4 + keylen]) != self._cacheKey(fname):
+                return False
+            root = marshal.loads(data[4 + keylen:])
+        except Exception:
+            # anything may come out of a truncated or corrupt file
+            return False
+
+        self.tree = _decodeElement(root, None)
+        for section in self.tree.getChildren():
+            if section.name == "design":
+                self.design = section
+            elif section.name == "components":
+                for c in section.getChildren():
+                    self.components.append(comp(c))
+            elif section.name == "libparts":
+                for p in section.getChildren():
+                    part = libpart(p)
+                    self.libparts.append(part)
+                    self.indexLibPart(part)
+            elif section.name == "libraries":
+                self.libraries.extend(section.getChildren())
+            elif section.name == "nets":
+                for n in section.getChildren():
+                    self.nets.append(n)
+                    self.indexNet(n)
+
+        self.endDocument()
+        return True
+
+    def _saveCache(self, fname):
+        """Save the loaded netlist to the cache file of fname.  Failing to
+        write the cache is not an error, the netlist is simply parsed again
+        next time.
+        """
+        sections = []
+        for section in self.tree.getChildren():
+            if section.name in _cached_sections:
+                sections.append(_encodeElement(section))
+        root = (self.tree.name, self.tree._attributes, self.tree.chars,
+                sections)
+
+        cachename = cacheFileName(fname)
+        tmpname = cachename + "." + str(os.getpid())
+        try:
+            key = marshal.dumps(self._cacheKey(fname))
+            f = open(tmpname, "wb")
+            try:
+                f.write(struct.pack("<I", len(key)))
+                f.write(key)
+                f.write(marshal.dumps(root))
+            finally:
+                f.close()
+
+            if os.path.exists(cachename):
+                os.remove(cachename)
+            os.rename(tmpname, cachename)
+        except (IOError, OSError):
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+
+    def stream(self, fname, sections=("components",), chunk_size=65536):
+        """Incrementally load a kicad generic netlist, generating each
+        component as soon as its element has been parsed.
+
+        Only the design header and the top level sections named in
+        'sections' are built, anything else is discarded as it is parsed.
+        Generated components are not kept in self.components or in the
+        tree, so the memory used stays constant however large the netlist.
+
+        Components precede the library parts in the netlist, so they are
+        generated without their libpart.  If "libparts" is one of the
+        sections, the libparts are available once the generator has been
+        exhausted, see findLibPart().
+
+        With errors="raise", the structure of the sections which are kept is
+        checked as they are parsed, as with load(), and the references of
+        the components are kept to report duplicates: the diagnostics are
+        in self.diagnostics once the generator has been exhausted.
+
+        Keywords:
+        fname -- The name of the generic netlist file to open
+        sections -- The top level sections to keep, any of "components",
+                    "libparts", "libraries" and "nets"
+        chunk_size -- The number of bytes handed to the parser at a time
+
+        """
+        queue = []
+        self._comp_queue = queue
+
+        sections = set(sections) | set(["design"])
+        if self.errors == "raise":
+            handler = _gNetValidatingStreamReader(self, sections)
+            self._stream_refs = set()
+        else:
+            handler = _gNetStreamReader(self, sections)
+
         try:
             self._reader = sax.make_parser()
-            self._reader.setContentHandler(_gNetReader(self))
-            self._reader.parse(fname)
+            self._reader.setContentHandler(handler)
+            # feed() does not hand a locator to the handler, the parser
+            # itself tells the line being parsed
+            handler.setDocumentLocator(self._reader)
+
+            f = open(fname, "rb")
+            try:
+                data = f.read(chunk_size)
+                while data:
+                    self._reader.feed(data)
+                    for c in queue:
+                        yield c
+                    del queue[:]
+                    data = f.read(chunk_size)
+
+                self._reader.close()
+                for c in queue:
+                    yield c
+                del queue[:]
+            finally:
+                f.close()
         except IOError as e:
-            print( __file__, ":", e, file=sys.stderr )
-            sys.exit(-1)
+            self._fail(netlistFileError, "io-error", str(e))
+        except sax.SAXParseException as e:
+            if self.errors != "raise":
+                raise
+            self._fail(netlistParseError, "parse-error", str(e),
+                       e.getLineNumber())
+        finally:
+            self._comp_queue = None
+            self._stream_refs = None
+
+
+
+# The properties of a component read by fieldKey() with the accessors of comp,
+# rather than as fields, by lowercased name
+_key_getters = {
+    "value": lambda c: c.getValue(),
+    "footprint": lambda c: c.getFootprint(),
+    "datasheet": lambda c: c.getDatasheet(),
+    "description": lambda c: c.getDescription(),
+    "lib": lambda c: c.getLibName(),
+    "part": lambda c: c.getPartName(),
+    }
+
+
+def _fieldGetter(name):
+    return lambda c: c.getField(name)
+
+
+def fieldKey(names):
+    """Return a key function, for netlist.groupComponents() or bomRollup,
+    returning the tuple of the properties called 'names' of a component.
+    Value, Footprint, Datasheet, Description, Lib and Part, in any case, are
+    read with the accessors of comp, other names are fields, see
+    comp.getField().
+    """
+    getters = []
+    for name in names:
+        getter = _key_getters.get(name.lower())
+        if getter is None:
+            getter = _fieldGetter(name)
+        getters.append(getter)
 
+    def key(c):
+        return tuple([getter(c) for getter in getters])
+    return key
+
+
+# The default properties grouping the components of a bomRollup
+rollup_key = ("Value", "Footprint", "MPN")
+
+
+class rollupGroup():
+    """A line of a bomRollup: the components of every board which share one
+    key, with the board by board breakdown.
+    """
+    def __init__(self, key):
+        self.key = key
+
+        # the total quantity, over all boards and their build counts
+        self.quantity = 0
+
+        # a (board name, build count, sorted references) tuple for each
+        # board using the part, in the order the boards were added
+        self.boards = []
+
+        # {board name: quantity} of the same boards
+        self._quantities = {}
+
+    def addBoard(self, name, count, refs):
+        self.boards.append((name, count, refs))
+        self.quantity += count * len(refs)
+        self._quantities[name] = count * len(refs)
+
+    def getBoardQuantities(self):
+        """Return a list of (board name, quantity) pairs, where the quantity
+        is the number of components per board times its build count"""
+        return [(name, count * len(refs)) for name, count, refs in self.boards]
+
+    def getBoardQuantity(self, name):
+        """Return the quantity of the board called name, see
+        getBoardQuantities(), or None if the board does not use the part"""
+        return self._quantities.get(name)
+
+
+class bomRollup():
+    """Aggregates the components of several boards, each built a number of
+    times, into a single purchasing BOM.
+
+    Boards are added one at a time, and only the key and the references of
+    each interesting component are kept, not the netlists: the memory used
+    grows with the number of references of all the boards, until the rollup
+    is dropped.  Each board must have a distinct name.
+
+    Keywords:
+    key -- a function taking a component and returning a hashable key, or a
+           sequence of property names given to fieldKey().  Defaults to
+           rollup_key.
+    compFilter -- the componentFilter leaving out the components which are
+                  not interesting, see getDefaultFilter()
+    """
+    def __init__(self, key=None, compFilter=None):
+        if key is None:
+            key = rollup_key
+        if not callable(key):
+            key = fieldKey(key)
+        self.key = key
+        self.compFilter = compFilter
+
+        # (board name, build count) of each board added
+        self.boards = []
+
+        self._groups = {}
+        self._order = []
+
+    def addComponents(self, components, count=1, name=""):
+        """Add the components of a board which is built 'count' times.
+        components may be any iterable, such as what netlist.stream()
+        generates, and is only iterated over once.  Raises ValueError if a
+        board called name was already added.
+        """
+        for board, boardCount in self.boards:
+            if board == name:
+                raise ValueError("board " + repr(name) + " added twice")
+
+        key = self.key
+        excludes = (self.compFilter or getDefaultFilter()).excludes
+
+        refsByKey = {}
+        order = []
+        for c in components:
+            if excludes(c):
+                continue
+            k = key(c)
+            refs = refsByKey.get(k)
+            if refs is None:
+                refs = []
+                refsByKey[k] = refs
+                order.append(k)
+            refs.append(c.getRef())
+
+        for k in order:
+            refs = refsByKey[k]
+            refs.sort(key=refSortKey)
+            group = self._groups.get(k)
+            if group is None:
+                group = rollupGroup(k)
+                self._groups[k] = group
+                self._order.append(group)
+            group.addBoard(name, count, refs)
+
+        self.boards.append((name, count))
+
+    def addNetlist(self, fname, count=1, name=None, cache=False, stream=True):
+        """Load the netlist file fname and add its components, see
+        addComponents().  The board is named after the file unless name is
+        given.
+
+        By default the netlist is read with netlist.stream(), twice: once
+        for its libparts, then for its components, each linked to its
+        libpart and dropped once added.  Only the libparts and one component
+        are kept in memory at a time, however large the netlist.  With
+        stream set to False, the whole netlist is loaded instead, from its
+        cache file if cache is set to True.
+        """
+        if name is None:
+            name = fname
+        if stream:
+            components = _streamLinked(fname)
+        else:
+            net = netlist()
+            net.load(fname, cache)
+            components = net.components
+        self.addComponents(components, count, name)
+
+    def getGroups(self):
+        """Return the list of rollupGroup, in the order their keys were first
+        seen"""
+        return list(self._order)
+
+    def getQuantity(self):
+        """Return the total number of components to buy"""
+        total = 0
+        for group in self._order:
+            total += group.quantity
+        return total
+
+
+def _streamLinked(fname):
+    """Generate the components of the netlist file fname, linked to their
+    libpart, see bomRollup.addNetlist()"""
+    parts = netlist()
+    for c in parts.stream(fname, sections=("libparts",)):
+        pass
+
+    for c in netlist().stream(fname):
+        p = parts.findLibPart(c)
+        if p:
+            c.setLibPart(p)
+        yield c
+
+
+def rollupNetlists(boards, key=None, compFilter=None, cache=False, stream=True):
+    """Return a bomRollup of several netlist files, see bomRollup.
+
+    Keywords:
+    boards -- an iterable of (netlist file name, build count) pairs
+    key, compFilter -- see bomRollup
+    cache, stream -- see bomRollup.addNetlist()
+    """
+    rollup = bomRollup(key, compFilter)
+    for fname, count in boards:
+        rollup.addNetlist(fname, count, cache=cache, stream=stream)
+    return rollup
+
+
+class stageLog():
+    """Records the wall time taken by, and the counts of, the stages of the
+    loading and processing of netlists: load, endDocument,
+    getInterestingComponents and groupComponents.  Each record is a dict
+    holding the 'stage' name, its duration in 'seconds', the 'time' it
+    ended and the 'pid' of the process, followed by the counts of the stage.
+
+    Keywords:
+    f -- An open file each record is written to as soon as it is made, as a
+         line of JSON, or None to keep the records in self.records instead
+    fname -- The name of a file to append the records to, opened on the first
+             record rather than when the stageLog is made (Optional)
+    """
+    def __init__(self, f=None, fname=None):
+        self.f = f
+        self.fname = fname
+        self.records = []
+
+    def record(self, stage, seconds, counts):
+        """Record a stage which took 'seconds', with the dict 'counts'"""
+        record = {"stage": stage, "seconds": seconds,
+                  "time": time.time(), "pid": os.getpid()}
+        record.update(counts)
+
+        if self.f is None and self.fname:
+            self.f = open(self.fname, "a")
+
+        if self.f is None:
+            self.records.append(record)
+        else:
+            self.f.write(json.dumps(record, sort_keys=True) + "\n")
+            self.f.flush()
+
+    def getTotals(self):
+        """Return a {stage: (number of records, total seconds)} dict of the
+        records kept in self.records"""
+        totals = {}
+        for record in self.records:
+            count, seconds = totals.get(record["stage"], (0, 0.0))
+            totals[record["stage"]] = (count + 1, seconds + record["seconds"])
+        return totals
+
+    def write(self, f):
+        """Write the records kept in self.records to the open file f, a line
+        of JSON each"""
+        for record in self.records:
+            f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def _defaultLog():
+    fname = os.environ.get("KICAD_NETLIST_LOG")
+    if fname:
+        return stageLog(fname=fname)
+    return None
+
+# The stageLog of the netlists created without one, or None to record nothing.
+# Setting the KICAD_NETLIST_LOG environment variable to the name of a file
+# appends the records of every netlist to that file, which instruments any
+# BOM script without changing it.  The file is only opened once there is
+# something to append to it.
+default_log = _defaultLog()
+
+
+# The version of the layout of netlist cache files, to be increased whenever
+# _encodeElement(), netlist._cacheKey() or _cached_sections change.
+_cache_format = 2
+
+# The top level sections of a netlist which are kept in its cache file.
+_cached_sections = ("design", "components", "libparts", "libraries", "nets")
+
+
+def cacheFileName(fname):
+    """Return the name of the cache file for the netlist file fname"""
+    return fname + ".cache"
+
+
+def _encodeElement(element):
+    """Return element and its subtree as nested tuples, which can be
+    marshalled: (name, attributes, chars, children)"""
+    children = None
+    if element._children:
+        children = [_encodeElement(c) for c in element._children]
+    return (element.name, element._attributes, element.chars, children)
+
+
+def _decodeElement(node, parent):
+    """Return the xmlElement tree described by node, as made by
+    _encodeElement()"""
+    name, attributes, chars, children = node
+
+    element = xmlElement(name, parent)
+    element._attributes = attributes
+    element.chars = chars
+    if children:
+        element._children = [_decodeElement(c, element) for c in children]
+
+    return element
 
 
 class _gNetReader(sax.handler.ContentHandler):
@@ -706,14 +2093,32 @@ class _gNetReader(sax.handler.ContentHandler):
     def __init__(self, aParent):
         self.parent = aParent
 
+        # Some attribute values and texts repeat as much as names do, see
+        # _shared_attributes and _shared_text, only one copy of each is kept
+        # while parsing.  Unlike names, values are only shared within one
+        # netlist.
+        self._values = {}
+
     def startElement(self, name, attrs):
         """Start of a new XML element event"""
         element = self.parent.addElement(name)
 
-        for name in attrs.getNames():
-            element.addAttribute(name, attrs.getValue(name))
+        # most elements have no attributes, and are left without a dict
+        if attrs.getLength():
+            intern = _internName
+            shared = _shared_attributes.get(element.name)
+            attributes = {}
+            for name, v in attrs.items():
+                if shared is not None and name in shared:
+                    v = self._values.setdefault(v, v)
+                attributes[intern(name)] = v
+            element._attributes = attributes
 
     def endElement(self, name):
+        element = self.parent._curr_element
+        if element.chars and element.name in _shared_text:
+            element.chars = self._values.setdefault(element.chars, element.chars)
+
         self.parent.endElement()
 
     def characters(self, content):
@@ -724,4 +2129,179 @@ class _gNetReader(sax.handler.ContentHandler):
 
     def endDocument(self):
         """End of the XML document event"""
+        # the shared values are only needed while parsing
+        self._values = None
         self.parent.endDocument()
+
+
+# The attributes, by element, whose values are shared by _gNetReader: those
+# which take few distinct values, unlike references, timestamps or net names.
+_shared_attributes = {
+    "libsource": ("lib", "part"),
+    "libpart": ("lib", "part"),
+    "sheetpath": ("names", "tstamps"),
+    "field": ("name",),
+    "node": ("pin",),
+    "pin": ("num", "type"),
+    }
+
+# The elements whose text is shared by _gNetReader, likewise
+_shared_text = frozenset(["value", "footprint", "datasheet", "field"])
+
+
+class _gNetStreamReader(_gNetReader):
+    """SAX kicad generic netlist content handler used by netlist.stream().
+    Top level sections which are not wanted are skipped entirely, so no
+    elements are ever created for them.
+
+    """
+    def __init__(self, aParent, sections):
+        _gNetReader.__init__(self, aParent)
+        self.sections = sections
+        self._depth = 0
+        # depth of the element being skipped, or 0 when not skipping
+        self._skip = 0
+
+    # the handler of the elements which are not skipped
+    _kept = _gNetReader
+
+    def startElement(self, name, attrs):
+        self._depth += 1
+        if self._skip:
+            return
+
+        # depth 1 is the root element, depth 2 the sections below it
+        if self._depth == 2 and name not in self.sections:
+            self._skip = self._depth
+            return
+
+        self._kept.startElement(self, name, attrs)
+
+    def endElement(self, name):
+        if self._skip:
+            if self._depth == self._skip:
+                self._skip = 0
+        else:
+            self._kept.endElement(self, name)
+
+            # the components are dropped once generated, so only share values
+            # within each of them to keep the memory used constant
+            if self._depth == 3:
+                self._values.clear()
+        self._depth -= 1
+
+    def characters(self, content):
+        if not self._skip:
+            self._kept.characters(self, content)
+
+
+# The elements of a generic netlist, and the elements each can be found in,
+# None standing for the root
+_netlist_parents = {
+    "export": (None,),
+    "design": ("export",),
+    "source": ("design", "title_block"),
+    "date": ("design", "title_block"),
+    "tool": ("design",),
+    "textvar": ("design",),
+    "sheet": ("design",),
+    "title_block": ("sheet",),
+    "title": ("title_block",),
+    "company": ("title_block",),
+    "rev": ("title_block",),
+    "comment": ("title_block",),
+    "components": ("export",),
+    "comp": ("components",),
+    "value": ("comp",),
+    "footprint": ("comp",),
+    "datasheet": ("comp",),
+    "fields": ("comp", "libpart"),
+    "field": ("fields",),
+    "property": ("comp",),
+    "libsource": ("comp",),
+    "sheetpath": ("comp",),
+    "tstamp": ("comp",),
+    "tstamps": ("comp",),
+    "libparts": ("export",),
+    "libpart": ("libparts",),
+    "description": ("libpart",),
+    "docs": ("libpart",),
+    "aliases": ("libpart",),
+    "alias": ("aliases",),
+    "footprints": ("libpart",),
+    "fp": ("footprints",),
+    "pins": ("libpart",),
+    "pin": ("pins",),
+    "libraries": ("export",),
+    "library": ("libraries",),
+    "uri": ("library",),
+    "nets": ("export",),
+    "net": ("nets",),
+    "node": ("net",),
+    }
+
+
+class _gNetValidatingReader(_gNetReader):
+    """SAX kicad generic netlist content handler used with errors="raise".
+    As the elements are parsed, those which are not part of the generic
+    netlist format, or are not where they belong, are reported once per
+    name as warnings in the diagnostics of the netlist.
+
+    """
+    def __init__(self, aParent):
+        _gNetReader.__init__(self, aParent)
+        self._locator = None
+        # the names of the open elements
+        self._path = []
+        # the names already reported
+        self._reported = set()
+
+    def setDocumentLocator(self, locator):
+        self._locator = locator
+
+    def _warn(self, code, name, message):
+        if name in self._reported:
+            return
+        self._reported.add(name)
+
+        line = None
+        if self._locator is not None:
+            line = self._locator.getLineNumber()
+        self.parent.diagnostics.append(diagnostic("warning", code, message, line))
+
+    def startElement(self, name, attrs):
+        parent = None
+        if self._path:
+            parent = self._path[-1]
+
+        parents = _netlist_parents.get(name)
+        if parents is None:
+            self._warn("unknown-tag", name, "unknown element " + name)
+        elif parent not in parents:
+            self._warn("misplaced-tag", name, "element " + name + " found in " +
+                       str(parent) + " instead of " +
+                       " or ".join([str(p) for p in parents]))
+
+        self._path.append(name)
+        _gNetReader.startElement(self, name, attrs)
+
+    def endElement(self, name):
+        self._path.pop()
+        _gNetReader.endElement(self, name)
+
+
+class _gNetValidatingStreamReader(_gNetStreamReader, _gNetValidatingReader):
+    """SAX kicad generic netlist content handler used by netlist.stream() with
+    errors="raise": the elements of the sections which are kept are checked
+    as by _gNetValidatingReader.
+
+    """
+    _kept = _gNetValidatingReader
+
+    def __init__(self, aParent, sections):
+        _gNetValidatingReader.__init__(self, aParent)
+        _gNetStreamReader.__init__(self, aParent, sections)
+
+    def setDocumentLocator(self, locator):
+        # named here, the python 2 lookup would find ContentHandler's first
+        _gNetValidatingReader.setDocumentLocator(self, locator)
@@ -0,0 +1,224 @@
+#
+# KiCad python module for normalizing the values of components, so that
+# equivalent values written differently, such as "4k7", "4.7K" and "4700" for
+# a resistor, can be recognized as the same.
+#
+# A value is parsed into a canonical (magnitude, unit) pair, e.g.
+# (4700.0, "ohm"), and can be written back in a single canonical form with
+# formatValue().  Units are "ohm", "F", "H", "V", "A", "W" and "Hz".
+#
+# No string formatting is used on purpose as the only string formatting that
+# is current compatible with python 2.4+ to 3.0+ is the '%' method, and that
+# is due to be deprecated in 3.0+ soon
+#
+
+from decimal import Decimal
+import re
+
+
+# The powers of ten of the SI prefixes, including the alternate spellings in
+# use in schematics: upper case K, N, P and U, "meg" as in SPICE, and R (or E)
+# marking the decimal point of values in ohms, e.g. 4R7.
+_prefixes = {
+    "p": -12, "P": -12,
+    "n": -9, "N": -9,
+    "u": -6, "U": -6, u"\u00b5": -6, u"\u03bc": -6,
+    "m": -3,
+    "": 0, "R": 0, "r": 0, "E": 0,
+    "k": 3, "K": 3,
+    "M": 6, "meg": 6, "Meg": 6, "MEG": 6,
+    "G": 9,
+    }
+
+# The canonical name of each spelling of a unit
+_units = {
+    "ohm": "ohm", "ohms": "ohm", "Ohm": "ohm", "Ohms": "ohm",
+    u"\u03a9": "ohm", u"\u2126": "ohm",
+    "F": "F", "f": "F",
+    "H": "H", "h": "H",
+    "V": "V", "v": "V",
+    "A": "A",
+    "W": "W",
+    "Hz": "Hz", "hz": "Hz", "HZ": "Hz",
+    }
+
+# A number, with either a decimal point (or comma) or an SI prefix standing
+# for it, e.g. 4.7k, 4,7k or 4k7, followed by an optional unit
+_value = re.compile(u"^\\s*(\\d*)(?:[.,](\\d*))?\\s*"
+                    u"(meg|Meg|MEG|[pPnNuU\u00b5\u03bcmrRkKMGE]?)(\\d*)\\s*"
+                    u"(ohms?|Ohms?|\u03a9|\u2126|Hz|hz|HZ|[fFhHvVAW]?)\\s*$")
+
+
+# The units of the components whose reference starts with the given letters
+ref_units = {
+    "R": "ohm",
+    "RN": "ohm",
+    "RV": "ohm",
+    "C": "F",
+    "L": "H",
+    }
+
+_ref_prefix = re.compile(r"^([A-Za-z]+)")
+
+
+def unitFromRef(ref):
+    """Return the unit of the value of the component with the reference ref,
+    e.g. "ohm" for R12, or "" if it cannot be told from the reference"""
+    m = _ref_prefix.match(ref)
+    if m:
+        return ref_units.get(m.group(1).upper(), "")
+    return ""
+
+
+# parseValue() results, by (value, unit).  The number of distinct values in
+# a design is small, so this is never pruned.
+_parsed = {}
+
+
+def parseValue(value, unit=""):
+    """Return the (magnitude, unit) of the component value string 'value',
+    e.g. (4700.0, "ohm") for "4k7" with unit "ohm", or None if value is not a
+    number such as "LM358", or is ambiguous: a bare number, such as "10",
+    when unit is neither "" nor "ohm", or a number written with an E
+    followed by digits, such as "1E3".  Results are memoized.
+
+    Keywords:
+    value -- the value of a component, e.g. "4.7K", "4k7", "100nF" or "4R7"
+    unit -- the unit to assume when the value has none, see unitFromRef()
+    """
+    key = (value, unit)
+    try:
+        return _parsed[key]
+    except KeyError:
+        pass
+
+    result = _parseValue(value, unit)
+    _parsed[key] = result
+    return result
+
+
+def _parseValue(value, unit):
+    m = _value.match(value)
+    if not m:
+        return None
+
+    whole, fraction, prefix, infix, suffix = m.groups()
+
+    if infix:
+        # the prefix stands for the decimal point, e.g. 4k7 or R22.  E is
+        # not taken as one when followed by digits: 1E3 is far more likely
+        # to mean 1000 than 1.3 ohms, so it is left alone.
+        if fraction is not None or prefix == "E":
+            return None
+        fraction = infix
+    if not whole and not fraction:
+        return None
+
+    if prefix in ("R", "r", "E"):
+        # R is only a decimal point for values in ohms, e.g. 4R7 or 100R
+        if suffix or unit not in ("", "ohm"):
+            return None
+        unit = "ohm"
+
+    if suffix:
+        unit = _units[suffix]
+    elif not prefix and unit not in ("", "ohm"):
+        # a bare number, such as 10 for a capacitor, may be in any unit (uF,
+        # pF...), only resistors are assumed to be in ohms
+        return None
+
+    # let float() round the exact decimal number, so that 4k7, 4.7K and 4700
+    # all give exactly the same magnitude
+    magnitude = float((whole or "0") + "." + (fraction or "0") + "e" +
+                      str(_prefixes[prefix]))
+    return (magnitude, unit)
+
+
+# The prefix letters written by formatValue(), by power of ten
+_format_prefixes = {-12: "p", -9: "n", -6: "u", -3: "m", 0: "", 3: "k", 6: "M", 9: "G"}
+_format_ohm_prefixes = {0: "R", 3: "K", 6: "M", 9: "G"}
+
+
+def formatValue(magnitude, unit):
+    """Return the canonical text of a (magnitude, unit) pair as returned by
+    parseValue().  Values in ohms are written in the RKM code, e.g. 4K7,
+    100R, 1M or R22, other values in engineering notation with their unit,
+    e.g. 100nF or 2.2uH.
+    """
+    sign, digits, exponent = Decimal(repr(float(magnitude))).as_tuple()
+
+    # strip the trailing zeros, the value is int(digits) * 10 ** exponent
+    digits = "".join([str(d) for d in digits])
+    stripped = digits.rstrip("0")
+    if stripped:
+        exponent += len(digits) - len(stripped)
+        digits = stripped
+    else:
+        digits = "0"
+        exponent = 0
+
+    # the power of ten of the most significant digit, and of the prefix
+    msd = exponent + len(digits) - 1
+    power = (msd // 3) * 3
+    if unit == "ohm":
+        power = max(power, 0)
+        prefixes = _format_ohm_prefixes
+    else:
+        prefixes = _format_prefixes
+    power = max(min(power, max(prefixes)), min(prefixes))
+
+    # the number of digits before the decimal point
+    count = msd - power + 1
+    if count <= 0:
+        whole = ""
+        fraction = "0" * -count + digits
+    elif count >= len(digits):
+        whole = digits + "0" * (count - len(digits))
+        fraction = ""
+    else:
+        whole = digits[:count]
+        fraction = digits[count:]
+
+    text = ""
+    if sign:
+        text = "-"
+
+    if unit == "ohm":
+        return text + whole + prefixes[power] + fraction
+
+    if fraction:
+        whole = (whole or "0") + "." + fraction
+    return text + whole + prefixes[power] + unit
+
+
+def normalizeValue(value, unit=""):
+    """Return the canonical text of the component value string 'value', see
+    parseValue() and formatValue(), or value itself if it is not a number"""
+    parsed = parseValue(value, unit)
+    if parsed is None:
+        return value
+    return formatValue(parsed[0], parsed[1])
+
+
+def canonicalValue(c):
+    """Return the (magnitude, unit) of the value of the component c, or its
+    value string if it cannot be parsed.  Only the values of components whose
+    unit can be told from their reference (see ref_units) are parsed, so that
+    part numbers such as 1N4148 are left alone, and bare numbers are only
+    taken as a magnitude for resistors, see parseValue().
+    """
+    value = c.getValue()
+    unit = unitFromRef(c.getRef())
+    if not unit:
+        return value
+    parsed = parseValue(value, unit)
+    if parsed is None:
+        return value
+    return parsed
+
+
+def groupKey(c):
+    """A key for netlist.groupComponents() grouping components by canonical
+    value, library and part, so that 4k7 and 4.7K resistors are grouped
+    together"""
+    return (canonicalValue(c), c.getLibName(), c.getPartName())
@@ -24,4 +24,4 @@ except IOError:
     print( __file__, ":", e, file=sys.stderr)
     f = stdout
 
-print(net.formatXML(), file=f)
+net.writeXML(f)
@@ -6,49 +6,33 @@
 
 from __future__ import print_function
 
-# Import the KiCad python helper module and the csv formatter
+# Import the KiCad python helper module and the value parser
 import kicad_netlist_reader
+import kicad_value_parser
 import sys
 
 def checkvalue(self):
-    """Check values, and replace with preferred/consistent values"""
-    ref = self.getRef()
-    r = ref.split("R")
-    c = ref.split("C")
+    """Check values, and replace with preferred/consistent values: the values
+    of resistors, capacitors and inductors are normalized (4.7K, 4k7 and 4700
+    all become 4K7, 0.1uF becomes 100nF, see kicad_value_parser.py), and a
+    decimal comma is replaced by a point in any other value.  Values which
+    are ambiguous, such as a bare 10 on a capacitor, are left as they are.
+    """
     v = self.getValue()
 
-    # Common to all values - convert decimation if necessary
-    dec = v.split(",")
-    if (len(dec) == 2):
-        newval = dec[0] + "." + dec[1]
-        self.setValue(newval)
-        v = self.getValue()
-
-    if len(r) == 2 and r[1].isdigit():
-        # This is a resistor - make values consistent
-        # If the value is a pure value, add R to the end of the value
-        if v.isdigit():
-            i = int(v)
-            if (i > 1000000):
-                i = i / 1000000
-                v = str(i) + "M"
-            if (i > 1000):
-                i = i / 1000
-                v = str(i) + "K"
-            else:
-                v = str(i) + "R"
-
-            self.setValue(v)
+    unit = kicad_value_parser.unitFromRef(self.getRef())
+    if unit:
+        newval = kicad_value_parser.normalizeValue(v, unit)
+    else:
+        # Common to all values - convert decimation if necessary
+        dec = v.split(",")
+        if (len(dec) == 2):
+            newval = dec[0] + "." + dec[1]
         else:
-            # Get the multiplier character
-            multiplier = v[len(v) - 1]
-            v = v.strip(multiplier)
-            v = v.split(".")
-            if (len(v) == 2):
-                newval = v[0] + multiplier + v[1]
-                self.setValue(newval)
-                v = self.getValue()
+            newval = v
 
+    if newval != v:
+        self.setValue(newval)
 
 
 # Give components a new method for checking the values (this could easily be a
@@ -63,11 +47,11 @@ net = kicad_netlist_reader.netlist(sys.argv[1])
 # instead
 try:
     f = open(sys.argv[2], 'w')
-except IOError:
+except IOError as e:
     print(__file__, ":", e, file=sys.stderr)
-    f = stdout
+    f = sys.stdout
 
 for c in net.components:
     c.checkvalue()
 
-print(net.formatXML(), file=f)
+net.writeXML(f)
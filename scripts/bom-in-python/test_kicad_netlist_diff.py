@@ -0,0 +1,52 @@
+#
+# Tests of kicad_netlist_diff.py
+#
+# Usage: python -m unittest test_kicad_netlist_diff
+#
+
+import unittest
+
+import kicad_netlist_diff as knd
+from test_kicad_netlist_reader import netlistTestCase, netlist_xml
+
+
+class diffTest(netlistTestCase):
+
+    def diff(self, text, match="ref"):
+        new = self.load(self.writeNetlist(text, "new.xml"))
+        return knd.diffNetlists(self.load(), new, match)
+
+    def testSame(self):
+        self.assertTrue(self.diff(netlist_xml).isEmpty())
+
+    def testComponents(self):
+        text = netlist_xml.replace("<value>1K</value>", "<value>2K2</value>")
+        text = text.replace('ref="C1"', 'ref="C2"')
+        diff = self.diff(text)
+
+        self.assertEqual(diff.components_changed, [("R4", {"Value": ("1K", "2K2")})])
+        self.assertEqual([p["Reference"] for p in diff.components_added], ["C2"])
+        self.assertEqual([p["Reference"] for p in diff.components_removed], ["C1"])
+
+    def testNets(self):
+        text = netlist_xml.replace('<node ref="C1" pin="2"/>',
+                                   '<node ref="R2" pin="1"/>')
+        text = text.replace('name="VCC"', 'name="+5V"')
+        diff = self.diff(text)
+
+        self.assertEqual(diff.nets_changed,
+                         [("GND", [("R2", "1")], [("C1", "2")])])
+        self.assertEqual([name for name, nodes in diff.nets_added], ["+5V"])
+        self.assertEqual(diff.nets_removed,
+                         [("VCC", [("C1", "1"), ("R1", "1")])])
+
+    def testNodeOrder(self):
+        text = netlist_xml.replace(
+            '<node ref="R1" pin="2"/>\n      <node ref="C1" pin="2"/>',
+            '<node ref="C1" pin="2"/>\n      <node ref="R1" pin="2"/>')
+        self.assertNotEqual(text, netlist_xml)
+        self.assertTrue(self.diff(text).isEmpty())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,347 @@
+#
+# Tests of kicad_netlist_reader.py
+#
+# Usage: python -m unittest test_kicad_netlist_reader
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import kicad_netlist_reader as knr
+
+
+# A small generic netlist, R3 and R4 have no libpart of their own: R4 is an
+# alias of device:R, R3 uses a libpart which is missing
+netlist_xml = """<?xml version="1.0" encoding="utf-8"?>
+<export version="D">
+  <design>
+    <source>test.sch</source>
+    <date>today</date>
+    <tool>eeschema</tool>
+  </design>
+  <components>
+    <comp ref="R1">
+      <value>10K</value>
+      <footprint>SM0603</footprint>
+      <fields>
+        <field name="MPN">RC0603-10K</field>
+      </fields>
+      <libsource lib="device" part="R"/>
+    </comp>
+    <comp ref="R2">
+      <value>10K</value>
+      <footprint>SM0603</footprint>
+      <libsource lib="device" part="R"/>
+    </comp>
+    <comp ref="R3">
+      <value>10K</value>
+      <footprint>SM0603</footprint>
+      <libsource lib="device" part="RMISSING"/>
+    </comp>
+    <comp ref="R4">
+      <value>1K</value>
+      <footprint>SM0603</footprint>
+      <libsource lib="device" part="RSMALL"/>
+    </comp>
+    <comp ref="C1">
+      <value>100nF</value>
+      <footprint>SM0603</footprint>
+      <libsource lib="device" part="C"/>
+    </comp>
+  </components>
+  <libparts>
+    <libpart lib="device" part="R">
+      <aliases>
+        <alias>RSMALL</alias>
+      </aliases>
+      <description>Resistor</description>
+      <fields>
+        <field name="Reference">R</field>
+        <field name="Value">R</field>
+        <field name="MPN">GENERIC-R</field>
+      </fields>
+    </libpart>
+    <libpart lib="device" part="C">
+      <description>Capacitor</description>
+      <fields>
+        <field name="Reference">C</field>
+        <field name="Value">C</field>
+      </fields>
+    </libpart>
+  </libparts>
+  <libraries>
+    <library logical="device">
+      <uri>device.lib</uri>
+    </library>
+  </libraries>
+  <nets>
+    <net code="1" name="VCC">
+      <node ref="R1" pin="1"/>
+      <node ref="C1" pin="1"/>
+    </net>
+    <net code="2" name="GND">
+      <node ref="R1" pin="2"/>
+      <node ref="C1" pin="2"/>
+    </net>
+  </nets>
+</export>
+"""
+
+
+class netlistTestCase(unittest.TestCase):
+    """Writes netlist_xml, or a variant of it, to a temporary directory"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fname = self.writeNetlist(netlist_xml)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def writeNetlist(self, text, name="test.xml"):
+        fname = os.path.join(self.tmpdir, name)
+        f = open(fname, "w")
+        f.write(text)
+        f.close()
+        return fname
+
+    def load(self, fname=None, **kwargs):
+        kwargs.setdefault("errors", "raise")
+        return knr.netlist(fname or self.fname, **kwargs)
+
+
+class refTest(unittest.TestCase):
+
+    def testNaturalSort(self):
+        refs = ["R10", "R2", "C1", "R1", "U1A", "R1B"]
+        self.assertEqual(sorted(refs, key=knr.refSortKey),
+                         ["C1", "R1", "R1B", "R2", "R10", "U1A"])
+
+    def testCompressRanges(self):
+        self.assertEqual(knr.compressRefs(["R1", "R2", "R3", "R4", "R8", "R12"]),
+                         "R1-R4, R8, R12")
+
+    def testCompressShortRuns(self):
+        # runs of two are not worth a range
+        self.assertEqual(knr.compressRefs(["R1", "R2", "R5"]), "R1, R2, R5")
+        self.assertEqual(knr.compressRefs(["R7"]), "R7")
+        self.assertEqual(knr.compressRefs([]), "")
+
+    def testCompressPrefixes(self):
+        # a run stops at a change of prefix or at a reference without number
+        self.assertEqual(knr.compressRefs(["C1", "C2", "C3", "R4", "R5", "R6"]),
+                         "C1-C3, R4-R6")
+        self.assertEqual(knr.compressRefs(["J1", "J2", "JP", "J3"]),
+                         "J1, J2, JP, J3")
+
+
+class selectorTest(netlistTestCase):
+
+    def testChildren(self):
+        net = self.load()
+        refs = list(net.select("components/comp/@ref"))
+        self.assertEqual(refs, ["R1", "R2", "R3", "R4", "C1"])
+
+    def testConditions(self):
+        net = self.load()
+        parts = list(net.select("libparts/libpart[@lib=device][@part='C']"))
+        self.assertEqual(len(parts), 1)
+        self.assertEqual(parts[0].get("description"), "Capacitor")
+
+        fields = list(net.select(
+            "libparts/libpart/fields/field[@name=MPN]"))
+        self.assertEqual([f.chars for f in fields], ["GENERIC-R"])
+
+    def testDescendants(self):
+        net = self.load()
+        fields = list(net.select("components/comp[@ref=R1]//field"))
+        self.assertEqual([f.chars for f in fields], ["RC0603-10K"])
+        self.assertEqual(list(net.select("nets//node[@ref=C1]/@pin")),
+                         ["1", "2"])
+
+    def testAnyName(self):
+        net = self.load()
+        self.assertEqual([e.name for e in net.select("*")],
+                         ["design", "components", "libparts", "libraries",
+                          "nets"])
+
+    def testElementSelect(self):
+        net = self.load()
+        comp = list(net.select("components/comp[@ref=C1]"))[0]
+        self.assertEqual(list(comp.select("libsource/@part")), ["C"])
+
+    def testInvalidPaths(self):
+        for path in ("", "comp//@ref", "@ref/comp", "comp comp"):
+            self.assertRaises(ValueError, knr.selector, path)
+
+    def testCompiledOnce(self):
+        self.assertTrue(knr.compileSelector("nets/net") is
+                        knr.compileSelector("nets/net"))
+
+
+class cacheTest(netlistTestCase):
+
+    def loadLogged(self):
+        log = knr.stageLog()
+        net = self.load(cache=True, log=log)
+        loads = [r for r in log.records if r["stage"] == "load"]
+        return net, loads[-1]["cached"]
+
+    def testRoundTrip(self):
+        parsed, cached = self.loadLogged()
+        self.assertFalse(cached)
+        self.assertTrue(os.path.exists(knr.cacheFileName(self.fname)))
+
+        net, cached = self.loadLogged()
+        self.assertTrue(cached)
+        self.assertEqual(net.formatXML(), parsed.formatXML())
+        self.assertEqual([c.getRef() for c in net.components],
+                         ["R1", "R2", "R3", "R4", "C1"])
+        self.assertEqual(net.components[3].getDescription(), "Resistor")
+        self.assertEqual(len(net.nets), 2)
+        self.assertEqual(net.getPinNet("C1", "2"), "GND")
+
+    def testModifiedNetlist(self):
+        self.loadLogged()
+        self.writeNetlist(netlist_xml.replace("100nF", "220nF and more"))
+
+        net, cached = self.loadLogged()
+        self.assertFalse(cached)
+        self.assertEqual(net.components[4].getValue(), "220nF and more")
+
+    def testCorruptCache(self):
+        self.loadLogged()
+        f = open(knr.cacheFileName(self.fname), "r+b")
+        f.seek(40)
+        f.truncate()
+        f.close()
+
+        net, cached = self.loadLogged()
+        self.assertFalse(cached)
+        self.assertEqual(len(net.components), 5)
+
+        # and the cache file was written again
+        net, cached = self.loadLogged()
+        self.assertTrue(cached)
+
+
+class diagnosticsTest(netlistTestCase):
+
+    def codes(self, net):
+        return [(d.code, d.ref) for d in net.diagnostics]
+
+    def testMissingLibpart(self):
+        net = self.load()
+        self.assertEqual(self.codes(net), [("missing-libpart", "R3")])
+        self.assertEqual(len(net.getErrors()), 1)
+
+    def testAliasIsNotMissing(self):
+        net = self.load()
+        self.assertEqual(net.components[3].getLibPart().getPartName(), "R")
+
+    def testDuplicateRef(self):
+        text = netlist_xml.replace('ref="R2"', 'ref="R1"')
+        # without the missing libpart, which would be printed
+        text = text.replace("RMISSING", "R")
+        fname = self.writeNetlist(text, "dup.xml")
+        for errors in ("raise", "exit"):
+            net = self.load(fname, errors=errors)
+            self.assertTrue(("duplicate-ref", "R1") in self.codes(net))
+
+    def testUnknownAndMisplacedTags(self):
+        text = netlist_xml.replace("<tool>eeschema</tool>",
+                                   "<tool>eeschema</tool><extra/><extra/>")
+        text = text.replace('<libsource lib="device" part="C"/>',
+                            '<libsource lib="device" part="C"/><node/>')
+        net = self.load(self.writeNetlist(text, "tags.xml"))
+        warnings = [d for d in net.diagnostics if d.severity == "warning"]
+        # each name is only reported once
+        self.assertEqual([d.code for d in warnings],
+                         ["unknown-tag", "misplaced-tag"])
+        self.assertEqual(warnings[0].line, 6)
+
+    def testMalformedFile(self):
+        fname = self.writeNetlist(netlist_xml[:600], "cut.xml")
+        try:
+            self.load(fname)
+        except knr.netlistParseError as e:
+            self.assertEqual(e.diagnostics[-1].code, "parse-error")
+        else:
+            self.fail("netlistParseError not raised")
+
+    def testMissingFile(self):
+        self.assertRaises(knr.netlistFileError, self.load,
+                          os.path.join(self.tmpdir, "missing.xml"))
+
+
+class streamTest(netlistTestCase):
+
+    def testComponents(self):
+        net = knr.netlist()
+        refs = [c.getRef() for c in net.stream(self.fname)]
+        self.assertEqual(refs, ["R1", "R2", "R3", "R4", "C1"])
+        self.assertEqual(net.components, [])
+        self.assertEqual(net.getSource(), "test.sch")
+
+    def testLibparts(self):
+        net = knr.netlist()
+        for c in net.stream(self.fname, sections=("components", "libparts")):
+            self.assertTrue(c.getLibPart() is None)
+        self.assertEqual(len(net.libparts), 2)
+
+
+    def testDiagnostics(self):
+        text = netlist_xml.replace('ref="R2"', 'ref="R1"')
+        text = text.replace("<tool>eeschema</tool>",
+                            "<tool>eeschema</tool><extra/>")
+        net = knr.netlist(errors="raise")
+        refs = [c.getRef() for c in net.stream(self.writeNetlist(text, "s.xml"))]
+        self.assertEqual(refs, ["R1", "R1", "R3", "R4", "C1"])
+        self.assertEqual([(d.code, d.line, d.ref) for d in net.diagnostics],
+                         [("unknown-tag", 6, None), ("duplicate-ref", None, "R1")])
+
+    def testMalformedFile(self):
+        net = knr.netlist(errors="raise")
+        fname = self.writeNetlist(netlist_xml[:600], "cut.xml")
+        self.assertRaises(knr.netlistParseError, list, net.stream(fname))
+
+
+class componentFilterTest(netlistTestCase):
+
+    def testAlternatives(self):
+        net = self.load()
+        f = knr.componentFilter(references=["^C"], values=["^1K$"])
+        self.assertEqual([c.getRef() for c in net.components
+                          if not f.excludes(c)], ["R1", "R2", "R3"])
+
+
+class rollupTest(netlistTestCase):
+
+    def testBoards(self):
+        # without the missing libpart, which would be printed by the loads
+        text = netlist_xml.replace("RMISSING", "R")
+        board = self.writeNetlist(text, "board.xml")
+        other = self.writeNetlist(text, "other.xml")
+        for stream in (True, False):
+            rollup = knr.rollupNetlists([(board, 2), (other, 3)],
+                                        key=("Value", "MPN"), stream=stream)
+            groups = dict([(g.key, g) for g in rollup.getGroups()])
+            self.assertEqual(sorted(groups), [("100nF", ""), ("10K", "GENERIC-R"),
+                                              ("10K", "RC0603-10K"),
+                                              ("1K", "GENERIC-R")])
+            r = groups[("10K", "GENERIC-R")]
+            self.assertEqual(r.quantity, 10)
+            self.assertEqual(r.getBoardQuantities(), [(board, 4), (other, 6)])
+            self.assertEqual(r.getBoardQuantity(other), 6)
+            self.assertEqual(groups[("100nF", "")].getBoardQuantity("none"), None)
+            self.assertEqual(rollup.getQuantity(), 5 * 5)
+
+    def testDuplicateBoard(self):
+        self.assertRaises(ValueError, knr.rollupNetlists,
+                          [(self.fname, 1), (self.fname, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#
+# Tests of kicad_value_parser.py
+#
+# Usage: python -m unittest test_kicad_value_parser
+#
+
+import unittest
+
+import kicad_value_parser as kvp
+
+
+class fakeComp():
+    def __init__(self, ref, value):
+        self.ref = ref
+        self.value = value
+
+    def getRef(self):
+        return self.ref
+
+    def getValue(self):
+        return self.value
+
+
+class parseValueTest(unittest.TestCase):
+
+    def testEquivalentResistorValues(self):
+        for value in ("4k7", "4.7K", "4700", "4K7", "4,7k"):
+            self.assertEqual(kvp.parseValue(value, "ohm"), (4700.0, "ohm"))
+            self.assertEqual(kvp.normalizeValue(value, "ohm"), "4K7")
+
+    def testDecimalComma(self):
+        self.assertEqual(kvp.parseValue("0,1u", "F"), (1e-7, "F"))
+        self.assertEqual(kvp.normalizeValue("0,1u", "F"), "100nF")
+
+    def testRAsDecimalPoint(self):
+        self.assertEqual(kvp.parseValue("R22"), (0.22, "ohm"))
+        self.assertEqual(kvp.normalizeValue("R22", "ohm"), "R22")
+        self.assertEqual(kvp.normalizeValue("4R7", "ohm"), "4R7")
+        # R is only a decimal point for resistors
+        self.assertEqual(kvp.parseValue("4R7", "F"), None)
+
+    def testENotationIsLeftAlone(self):
+        self.assertEqual(kvp.parseValue("1E3", "ohm"), None)
+        self.assertEqual(kvp.normalizeValue("1E3", "ohm"), "1E3")
+        self.assertEqual(kvp.normalizeValue("100E", "ohm"), "100R")
+
+    def testBareNumbersOnlyForResistors(self):
+        self.assertEqual(kvp.parseValue("10", "F"), None)
+        self.assertEqual(kvp.parseValue("1.5", "H"), None)
+        self.assertEqual(kvp.normalizeValue("10", "F"), "10")
+        self.assertEqual(kvp.normalizeValue("1.5", "H"), "1.5")
+        self.assertEqual(kvp.normalizeValue("100", "ohm"), "100R")
+        # with a prefix or a unit, the value is not bare
+        self.assertEqual(kvp.normalizeValue("100n", "F"), "100nF")
+        self.assertEqual(kvp.normalizeValue("10uH", "H"), "10uH")
+
+    def testNotAValue(self):
+        self.assertEqual(kvp.parseValue("LM358"), None)
+        self.assertEqual(kvp.normalizeValue("LM358"), "LM358")
+
+
+class canonicalValueTest(unittest.TestCase):
+
+    def testResistors(self):
+        self.assertEqual(kvp.canonicalValue(fakeComp("R1", "4k7")),
+                         kvp.canonicalValue(fakeComp("R2", "4700")))
+
+    def testBareCapacitorAndInductorValues(self):
+        self.assertEqual(kvp.canonicalValue(fakeComp("C1", "10")), "10")
+        self.assertEqual(kvp.canonicalValue(fakeComp("L1", "1.5")), "1.5")
+        self.assertEqual(kvp.canonicalValue(fakeComp("C2", "100nF")), (1e-7, "F"))
+
+    def testPartNumbers(self):
+        self.assertEqual(kvp.canonicalValue(fakeComp("D1", "1N4148")), "1N4148")
+
+
+if __name__ == '__main__':
+    unittest.main()
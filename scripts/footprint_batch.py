@@ -0,0 +1,321 @@
+#!/usr/bin/python
+
+# Generate footprint variants with the footprint wizards, without the footprint
+# wizard frame, and save them in a .pretty library.
+
+# 1) Build target _pcbnew after enabling scripting in cmake.
+# $ make _pcbnew
+
+# 2) Changed dir to pcbnew
+# $ cd pcbnew
+# $ pwd
+# build/pcbnew
+
+# 3) Entered following command line, script takes a spec file and the library:
+# $ PYTHONPATH=. <path_to>/footprint_batch.py --plugins <path_to>/pcbnew/scripting/plugins bga.json /tmp/bga.pretty
+
+# The spec file is JSON, a list of variant sets such as:
+#
+# [
+#   {
+#     "wizard": "BGA",
+#     "name": "BGA-{row count}x{column count}_P{pad pitch}mm",
+#     "parameters": {
+#       "Pads": {
+#         "pad pitch": [0.5, 0.8, 1.0],
+#         "pad size": 0.4,
+#         "row count": [8, 10, 12],
+#         "column count": [8, 10, 12]
+#       }
+#     }
+#   }
+# ]
+#
+# A variant is generated for each combination of the values given as lists.
+# Parameters not given keep the default of the wizard.  Lengths are in mm
+# unless "units" is "iu", natural and boolean parameters (whose name starts
+# with a '*' in the wizard, which can be left out) are taken as they are.
+#
+# "name" is the name of the footprint in the library, where {reference} and
+# {wizard} are replaced by the reference set by the wizard and the name of the
+# wizard, and {<parameter>} by the value of the parameter as written in the
+# spec file.  It defaults to "{reference}", which is only unique when a
+# single parameter is swept.
+#
+# The variants are built in parallel, one process per core by default.  A
+# variant is only built again if its wizard, its parameters or the plugins
+# have changed since it was saved in the library, or if --force is given: the
+# library keeps track of what was built in a .footprint_batch.json file.
+
+
+from __future__ import print_function
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+
+import pcbnew
+
+
+MANIFEST = ".footprint_batch.json"
+
+
+def loadWizards(plugpath):
+    """Load the plugins and return the registered footprint wizards, by name"""
+    if not pcbnew.KICAD_FOOTPRINT_WIZARDS:
+        pcbnew.LoadPlugins(plugpath)
+    return pcbnew.KICAD_FOOTPRINT_WIZARDS
+
+
+def pluginsDigest(wizard):
+    """A digest of the python files of the directory of the wizard, so that
+    its variants are built again when it, or one of its helpers, changes"""
+    module = sys.modules[type(wizard).__module__]
+    directory = os.path.dirname(os.path.abspath(module.__file__))
+
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".py"):
+            f = open(os.path.join(directory, name), "rb")
+            digest.update(name.encode("utf8"))
+            digest.update(f.read())
+            f.close()
+    return digest.hexdigest()
+
+
+def defaultValues(wizard):
+    """The {page: {name: value}} of the current parameters of the wizard, as
+    strings, as given to SetParameterValues()"""
+    values = {}
+    for page_n in range(wizard.GetNumParameterPages()):
+        names = wizard.GetParameterNames(page_n)
+        page = dict(zip(names, wizard.GetParameterValues(page_n)))
+        values[wizard.GetParameterPageName(page_n)] = page
+    return values
+
+
+def paramValue(key, value, units):
+    """The value of the wizard parameter key for the spec file value"""
+    if isinstance(value, bool):
+        return str(value)
+    if key.startswith("*") or units == "iu":
+        return str(value)
+    return str(pcbnew.FromMM(value))
+
+
+def expandVariants(entry, wizards, digests):
+    """Generate the tasks of each variant of a variant set of the spec file"""
+    wizard_name = entry["wizard"]
+    if wizard_name not in wizards:
+        raise ValueError("Unknown footprint wizard '" + wizard_name + "', have: " +
+                         ", ".join(sorted(wizards)))
+    wizard = wizards[wizard_name]
+    defaults = defaultValues(wizard)
+    units = entry.get("units", "mm")
+    template = entry.get("name", "{reference}")
+
+    # the spec parameters as a list of (page, key, given name, values)
+    swept = []
+    for page, params in sorted(entry.get("parameters", {}).items()):
+        if page not in defaults:
+            raise ValueError(wizard_name + ": no parameter page '" + page + "'")
+        for name, values in sorted(params.items()):
+            key = name
+            if key not in defaults[page]:
+                key = "*" + name
+            if key not in defaults[page]:
+                raise ValueError(wizard_name + ": no parameter '" + name +
+                                 "' in page '" + page + "'")
+            if not isinstance(values, list):
+                values = [values]
+            swept.append((page, key, name, values))
+
+    if wizard_name not in digests:
+        digests[wizard_name] = pluginsDigest(wizard)
+
+    for combination in itertools.product(*[s[3] for s in swept]):
+        values = dict([(page, dict(params)) for page, params in defaults.items()])
+        fields = {}
+        for (page, key, name, v), value in zip(swept, combination):
+            values[page][key] = paramValue(key, value, units)
+            fields[name] = value
+            fields[key] = value
+
+        key = hashlib.sha1(json.dumps([wizard_name, values, template,
+                                       digests[wizard_name]],
+                                      sort_keys=True).encode("utf8")).hexdigest()
+
+        yield {"key": key, "wizard": wizard_name, "values": values,
+               "name": template, "fields": fields}
+
+
+#-----<Workers>-------------------------------------------------------------------
+
+_worker = {}
+
+
+def _initWorker(plugpath, library, verbose):
+    _worker["wizards"] = loadWizards(plugpath)
+    _worker["library"] = library
+    _worker["verbose"] = verbose
+    _worker["plugin"] = pcbnew.IO_MGR.PluginFind(pcbnew.IO_MGR.KICAD)
+
+
+def _buildVariant(task):
+    """Build and save the footprint of a variant, return (key, footprint
+    name, error)"""
+    wizard = _worker["wizards"][task["wizard"]]
+
+    # the wizards print their parameters as they go
+    stdout = sys.stdout
+    if not _worker["verbose"]:
+        sys.stdout = open(os.devnull, "w")
+
+    try:
+        try:
+            for page_n in range(wizard.GetNumParameterPages()):
+                values = task["values"][wizard.GetParameterPageName(page_n)]
+                wizard.SetParameterValues(page_n,
+                        [values[name] for name in wizard.GetParameterNames(page_n)])
+
+            wizard.module = None
+            module = wizard.GetModule()
+        finally:
+            if sys.stdout is not stdout:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+        errors = []
+        for page, params in getattr(wizard, "parameter_errors", {}).items():
+            for name, error in params.items():
+                if error:
+                    errors.append(page + "/" + name + ": " + error)
+        if errors or module is None:
+            return (task["key"], None, "; ".join(errors) or "no footprint built")
+
+        fields = dict(task["fields"])
+        fields["wizard"] = task["wizard"]
+        fields["reference"] = module.GetReference()
+        name = task["name"].format(**fields)
+        if not isinstance(name, str):
+            # python 2, the names read from the spec file are unicode
+            name = name.encode("utf8")
+
+        module.SetFPID(pcbnew.FPID(name))
+        _worker["plugin"].FootprintSave(_worker["library"], module)
+
+    except Exception as e:
+        return (task["key"], None, str(e).strip())
+
+    return (task["key"], name, None)
+
+#-----</Workers>------------------------------------------------------------------
+
+
+def readManifest(library):
+    """The {variant key: footprint name} of the variants saved in library"""
+    path = os.path.join(library, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    f = open(path)
+    manifest = json.load(f)
+    f.close()
+    return manifest
+
+
+def writeManifest(library, manifest):
+    path = os.path.join(library, MANIFEST)
+    f = open(path + ".tmp", "w")
+    json.dump(manifest, f, indent=1, sort_keys=True)
+    f.close()
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(path + ".tmp", path)
+
+
+def isUpToDate(library, manifest, task):
+    name = manifest.get(task["key"])
+    return name is not None and \
+        os.path.exists(os.path.join(library, name + ".kicad_mod"))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Generate footprint variants with the footprint wizards")
+    parser.add_argument("spec", help="the JSON file listing the variants")
+    parser.add_argument("library", help="the .pretty library to save them in")
+    parser.add_argument("--plugins", default=None,
+                        help="the directory of the footprint wizards")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="the number of processes (default: one per core)")
+    parser.add_argument("--force", action="store_true",
+                        help="build the variants which are up to date too")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="show the output of the wizards")
+    args = parser.parse_args(argv)
+
+    f = open(args.spec)
+    spec = json.load(f)
+    f.close()
+    if isinstance(spec, dict):
+        spec = [spec]
+
+    wizards = loadWizards(args.plugins)
+
+    digests = {}
+    tasks = []
+    for entry in spec:
+        tasks.extend(expandVariants(entry, wizards, digests))
+
+    plugin = pcbnew.IO_MGR.PluginFind(pcbnew.IO_MGR.KICAD)
+    if not os.path.isdir(args.library):
+        plugin.FootprintLibCreate(args.library)
+
+    manifest = readManifest(args.library)
+    todo = [task for task in tasks
+            if args.force or not isUpToDate(args.library, manifest, task)]
+
+    print(len(tasks), "variants,", len(tasks) - len(todo), "up to date")
+
+    names = {}
+    failed = 0
+    initargs = (args.plugins, args.library, args.verbose)
+
+    if args.jobs == 1 or len(todo) < 2:
+        _initWorker(*initargs)
+        results = (_buildVariant(task) for task in todo)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(args.jobs, _initWorker, initargs)
+        results = pool.imap_unordered(_buildVariant, todo)
+
+    try:
+        for key, name, error in results:
+            if error:
+                failed += 1
+                print("error:", error, file=sys.stderr)
+                continue
+
+            if name in names:
+                print("warning: more than one variant named", name,
+                      "(use a name template)", file=sys.stderr)
+            names[name] = key
+            manifest[key] = name
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        writeManifest(args.library, manifest)
+
+    print(len(names), "footprints saved in", args.library + ",", failed, "failed")
+
+    if failed:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))